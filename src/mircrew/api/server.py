@@ -14,6 +14,7 @@ import urllib.parse
 import threading
 import time
 from datetime import datetime
+import html
 import io
 
 # Set up centralized logging
@@ -397,7 +398,6 @@ class MirCrewAPIServer:
                 cmd_args.extend(['-q', ''])
             else:
                 # No specific parameters - do a default search with current year
-                from datetime import datetime
                 current_year = str(datetime.now().year)
                 cmd_args.extend(['-year', current_year])
 
@@ -461,7 +461,6 @@ class MirCrewAPIServer:
     def _error_response(self, message: str, code: int = 500) -> Response:
         """Return error response in Torznab format"""
         # Escape special characters in the message to prevent XML parsing issues
-        import html
         escaped_message = html.escape(message, quote=True)
         error_xml = f'''<?xml version="1.0" encoding="UTF-8"?>
 <error code="{code}" description="{escaped_message}"/>'''
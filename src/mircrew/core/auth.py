@@ -1,16 +1,26 @@
+import json
 import os
 import re
 import time
 import random
-from typing import Tuple, Optional, Dict
+import ssl
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from itertools import accumulate
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Tuple, Optional, Dict, Union
 import requests
-from bs4 import BeautifulSoup, Tag
-from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from requests.utils import DEFAULT_CA_BUNDLE_PATH
+import lxml.html
+from lxml import etree
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+from urllib3.util.ssl_ import create_urllib3_context
 import logging
 
-# Load environment variables from .env file
-load_dotenv()
-
 # Set up basic logging if centralized logging is not available
 def setup_basic_logging() -> None:
     """Setup basic logging configuration"""
@@ -33,87 +43,373 @@ except ImportError:
 
 logger = get_logger(__name__)
 
+# Only advertise encodings urllib3 can decode: "br" is listed only when brotli/brotlicffi is installed
+_ACCEPT_ENCODING = ', '.join(ACCEPT_ENCODING.split(','))
+if 'br' not in _ACCEPT_ENCODING:
+    logger.warning("⚠️ brotli is not installed - pages will be downloaded with gzip instead of br")
+
+# Login retry tuning: unrecognised failures are unlikely to fix themselves, so give up early
+_MAX_UNKNOWN_FAILURES = 3
+_MAX_BACKOFF_DELAY = 15.0
+
+# Credential failure phrases, matched case-insensitively in the text of error boxes
+_FAILURE_RE = re.compile(
+    r'login unsuccessful|invalid username|wrong password|authentication failed|il nome utente'
+    r'|la password|accesso negato|non autorizzato|validation failed|form not valid',
+    re.IGNORECASE
+)
+
+# Page indicators, searched case-insensitively in the raw (UTF-8) response bytes
+_FAILURE_BYTES_RE = re.compile(_FAILURE_RE.pattern.encode('utf-8'), re.IGNORECASE)
+_SUCCESS_RE = re.compile(
+    rb'logout|welcome|my account|profile|logged in as|benvenuto|profilo',  # benvenuto/profilo: Italian
+    re.IGNORECASE
+)
+_MAIN_CONTENT_RE = re.compile(rb'forum|threads|posts|community', re.IGNORECASE)
+# Positive signs of a registered user: the logout link only phpBB members get
+_SESSION_OK_RE = re.compile(rb'mode=logout|disconnetti', re.IGNORECASE)
+_CSRF_REJECTED_RE = re.compile('il form inviato non è valido'.encode('utf-8'), re.IGNORECASE)
+_ANTI_BOT_RE = re.compile(rb'captcha|verification|robot', re.IGNORECASE)
+_BLOCKED_RE = re.compile(rb'ban|suspended|blocked', re.IGNORECASE)
+_MAINTENANCE_RE = re.compile(rb'modo manutenzione|maintenance', re.IGNORECASE)
+
+# Login form lookup, in priority order: login action, username field, any form
+_LOGIN_FORM_XPATHS = (
+    etree.XPath("//form[contains(@action, 'mode=login')]"),
+    etree.XPath("//form[.//input[@name='username']]"),
+    etree.XPath("//form"),
+)
+_FORM_INPUTS_XPATH = etree.XPath(".//input[@name]")
+
+# Message boxes whose class mentions error/danger (case-insensitive), as phpBB themes use
+_ERROR_ELEMENTS_XPATH = etree.XPath(
+    "//*[self::div or self::span or self::p]"
+    "[contains(translate(@class, 'ERORDANG', 'erordang'), 'error')"
+    " or contains(translate(@class, 'ERORDANG', 'erordang'), 'danger')]"
+)
+
+# Session cookies persisted between runs (override with MIRCREW_COOKIE_CACHE)
+_DEFAULT_COOKIE_CACHE = Path.home() / '.cache' / 'mircrew' / 'cookies.json'
+_COOKIE_FIELDS = ('name', 'value', 'domain', 'path')
+
+# Serialises credential reads against test_login()'s temporary removal of them
+_ENV_LOCK = threading.RLock()
+
+# Static part of the login POST, plus the hidden CSRF fields copied from the form (in order)
+_PAYLOAD_TEMPLATE = MappingProxyType({
+    'autologin': '1',  # Remember login
+    'viewonline': '1',  # Show online status
+    'login': 'Login'  # Submit button value
+})
+_HIDDEN_FIELDS = ('sid', 'form_token', 'creation_time')
+
+# Chunk size used when streaming the login page through the incremental parser
+_LOGIN_PAGE_CHUNK = 8192
+
+# Bytes of the index page scanned by is_logged_in() before reading the rest
+_SESSION_PROBE_BYTES = 32 * 1024
+_REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+# Connection pool sizing and transport-level retries for the login session; the login
+# POST is never resent (its form_token is single-use), and the final 5xx/429 response
+# is still returned so login() can log and back off
+_POOL_CONNECTIONS = 4
+_POOL_MAXSIZE = 16
+_ADAPTER_RETRY = Retry(
+    total=3,
+    backoff_factor=0.5,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset(['GET', 'HEAD']),
+    raise_on_status=False
+)
+
+
+# Expanded user agent pool for better rotation
+_USER_AGENTS = (
+    # Windows Chrome versions
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36",
+
+    # macOS Chrome versions
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36",
+
+    # Linux Chrome
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+
+    # Windows Firefox
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/121.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/120.0",
+
+    # macOS Firefox
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:109.0) Gecko/20100101 Firefox/121.0",
+
+    # Windows Edge
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36 Edg/120.0.0.0",
+
+    # Linux Firefox
+    "Mozilla/5.0 (X11; Linux x86_64; rv:109.0) Gecko/20100101 Firefox/121.0"
+)
+
+
+def _build_headers_profile(user_agent: str) -> Dict[str, str]:
+    """
+    Build the full, browser-consistent header set for one user agent.
+
+    Args:
+        user_agent: User-Agent string the headers must agree with
+
+    Returns:
+        Dict[str, str]: Session headers for that browser
+    """
+    # Extract browser info for consistent headers
+    is_chrome = 'Chrome' in user_agent and 'Edg' not in user_agent
+    is_edge = 'Edg' in user_agent
+
+    headers = {
+        'User-Agent': user_agent,
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+        'Accept-Language': 'it-IT,it;q=0.9,en-US;q=0.8,en;q=0.7',
+        'Accept-Encoding': _ACCEPT_ENCODING,
+        'DNT': '1',
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1',
+        'Sec-Fetch-Dest': 'document',
+        'Sec-Fetch-Mode': 'navigate',
+        'Sec-Fetch-Site': 'none',
+        'Sec-Fetch-User': '?1',
+        'Cache-Control': 'max-age=0'
+    }
+
+    # Browser-specific headers (Firefox doesn't use sec-ch-ua headers)
+    if is_chrome or is_edge:
+        headers['sec-ch-ua'] = '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"'
+        headers['sec-ch-ua-mobile'] = '?0'
+        headers['sec-ch-ua-platform'] = '"Windows"' if 'Windows' in user_agent else ('"macOS"' if 'Mac' in user_agent else '"Linux"')
+
+    return headers
+
+
+# (user agent, headers) pairs, built once at import
+_UA_PROFILES = tuple((ua, _build_headers_profile(ua)) for ua in _USER_AGENTS)
+
+# Relative pick weights, aligned with _USER_AGENTS, roughly following real browser market share
+_UA_WEIGHTS = (
+    12, 10, 6, 4,  # Windows Chrome
+    5, 4, 2,  # macOS Chrome
+    2,  # Linux Chrome
+    4, 3,  # Windows Firefox
+    2,  # macOS Firefox
+    6,  # Windows Edge
+    1  # Linux Firefox
+)
+_UA_CUM_WEIGHTS = tuple(accumulate(_UA_WEIGHTS))
+
+
+@lru_cache(maxsize=None)
+def _load_env() -> bool:
+    """Load environment variables from the .env file, once, when credentials are first needed"""
+    from dotenv import load_dotenv
+    return load_dotenv()
+
+
+def _cookie_cache_path() -> Path:
+    """Resolve where session cookies are persisted between runs"""
+    _load_env()
+    return Path(os.getenv('MIRCREW_COOKIE_CACHE') or _DEFAULT_COOKIE_CACHE)
+
+
+def _parse_html(content: Union[str, bytes]) -> Optional[lxml.html.HtmlElement]:
+    """
+    Parse an HTML document with lxml.
+
+    Args:
+        content: Raw HTML, as text or undecoded bytes
+
+    Returns:
+        Optional[lxml.html.HtmlElement]: Document root, or None if there is nothing to parse
+    """
+    if not content or not content.strip():
+        return None
+    try:
+        return lxml.html.fromstring(content)
+    except ValueError:
+        if isinstance(content, bytes):
+            raise
+        # lxml refuses str input that carries an XML encoding declaration
+        return lxml.html.fromstring(content.encode('utf-8'))
+    except etree.ParserError:
+        return None
+
+def _extract_login_form_fields(tree: lxml.html.HtmlElement) -> Dict[str, str]:
+    """
+    Collect the named inputs of the login form in a parsed page.
+
+    Args:
+        tree: Parsed login page
+
+    Returns:
+        Dict[str, str]: Form field names mapped to their values
+    """
+    # Find the login form - try each strategy in turn
+    for form_xpath in _LOGIN_FORM_XPATHS:
+        forms = form_xpath(tree)
+        if forms:
+            return _form_inputs(forms[0])
+    return {}
+
+
+def _form_inputs(form: etree._Element) -> Dict[str, str]:
+    """Map the named inputs of a form element to their values"""
+    return {field.get('name'): field.get('value') or '' for field in _FORM_INPUTS_XPATH(form)}
+
+
+@lru_cache(maxsize=None)
+def _shared_ssl_context() -> ssl.SSLContext:
+    """Build the SSL context shared by every login connection, CA bundle loaded once"""
+    context = create_urllib3_context()
+    context.load_verify_locations(cafile=DEFAULT_CA_BUNDLE_PATH)
+    return context
+
+
+def _close_prefetched_response(future: 'Future[requests.Response]') -> None:
+    """Close the response of a finished login page prefetch, if it produced one"""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+class _SharedTLSAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that hands all its HTTPS pools one prebuilt SSL context.
+
+    Without it urllib3 builds a fresh context and re-reads the CA bundle for
+    every new TLS connection, which is what each login retry pays for.
+    """
+
+    def init_poolmanager(self, connections: int, maxsize: int, block: bool = False, **pool_kwargs: Any) -> None:
+        pool_kwargs.setdefault('ssl_context', _shared_ssl_context())
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+
+    def cert_verify(self, conn: Any, url: str, verify: Any, cert: Any) -> None:
+        super().cert_verify(conn, url, verify, cert)  # type: ignore[no-untyped-call]
+        conn_kw = getattr(conn, 'conn_kw', None)
+        if conn_kw is None or 'ssl_context' not in conn_kw:
+            return
+        if verify is True:
+            # The shared context already trusts the default bundle
+            conn.ca_certs = None
+            conn.ca_cert_dir = None
+        else:
+            # Custom/disabled verification would mutate the shared context
+            conn_kw.pop('ssl_context')
+
+
+def mount_session_adapter(session: requests.Session, retry: Retry = _ADAPTER_RETRY) -> None:
+    """
+    Mount the pooled, shared-TLS-context adapter on a session.
+
+    Also limits the session's Accept-Encoding to the encodings urllib3 can decode here.
+
+    Args:
+        session: Session to configure
+        retry: Transport-level retry policy (default: the login session's)
+    """
+    adapter = _SharedTLSAdapter(
+        pool_connections=_POOL_CONNECTIONS,
+        pool_maxsize=_POOL_MAXSIZE,
+        max_retries=retry
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'Accept-Encoding': _ACCEPT_ENCODING})
+
 class MirCrewLogin:
     """
     Handles authentication for mircrew-releases.org forum with enhanced anti-detection measures
     """
 
-    def __init__(self) -> None:
+    def __init__(self, stealth: bool = True) -> None:
+        """
+        Initialize login handler.
+
+        Args:
+            stealth: Add human-like pauses between requests (backoff after failures always applies)
+        """
         self.base_url = "https://mircrew-releases.org"
+        self._stealth = stealth
         self.login_url = f"{self.base_url}/ucp.php?mode=login&redirect=index.php"
         self.session = requests.Session()
+        mount_session_adapter(self.session)
+
+        # Login page fetched in the background while _establish_session waits
+        self._prefetch_executor: Optional[ThreadPoolExecutor] = None
+        self._prefetched_login: Optional['Future[requests.Response]'] = None
 
         # Configure session headers with enhanced anti-detection
         self._setup_session_headers()
 
+        # phpBB session ID of the logged-in session, needed by logout()
+        self._sid = ''
+
+        # Cookies from a previous run, verified once at the start of login()
+        self._cookies_restored = self._load_cached_cookies()
+
     def _setup_session_headers(self) -> None:
-        """Setup session headers with enhanced rotating user agents and better anti-detection"""
-        # Expanded user agent pool for better rotation
-        user_agents = [
-            # Windows Chrome versions
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36",
-
-            # macOS Chrome versions
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36",
-
-            # Linux Chrome
-            "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-
-            # Windows Firefox
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/121.0",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/120.0",
-
-            # macOS Firefox
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:109.0) Gecko/20100101 Firefox/121.0",
-
-            # Windows Edge
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36 Edg/120.0.0.0",
-
-            # Linux Firefox
-            "Mozilla/5.0 (X11; Linux x86_64; rv:109.0) Gecko/20100101 Firefox/121.0"
-        ]
-
-        selected_ua = random.choice(user_agents)
-
-        # Extract browser info for consistent headers
-        is_chrome = 'Chrome' in selected_ua and 'Edg' not in selected_ua
-        is_firefox = 'Firefox' in selected_ua
-        is_edge = 'Edg' in selected_ua
-
-        headers = {
-            'User-Agent': selected_ua,
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-            'Accept-Language': 'it-IT,it;q=0.9,en-US;q=0.8,en;q=0.7',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none',
-            'Sec-Fetch-User': '?1',
-            'Cache-Control': 'max-age=0'
-        }
-
-        # Browser-specific headers
-        if is_chrome or is_edge:
-            headers['sec-ch-ua'] = '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"'
-            headers['sec-ch-ua-mobile'] = '?0'
-            headers['sec-ch-ua-platform'] = '"Windows"' if 'Windows' in selected_ua else ('"macOS"' if 'Mac' in selected_ua else '"Linux"')
-        elif is_firefox:
-            # Firefox doesn't use sec-ch-ua headers
-            pass
+        """Setup session headers from a randomly picked, precomputed browser profile"""
+        _, headers = random.choices(_UA_PROFILES, cum_weights=_UA_CUM_WEIGHTS)[0]
+
+        # Replace rather than merge, so no header from the previous browser lingers
+        self.session.headers.clear()
+        self.session.headers.update(headers)
 
         # Randomize some headers to appear more natural
-        if random.choice([True, False]):
-            headers['Referer'] = f"{self.base_url}/"
+        if random.getrandbits(1):
+            self.session.headers.update({'Referer': f"{self.base_url}/"})
 
-        self.session.headers.update(headers)
+    def _load_cached_cookies(self) -> bool:
+        """
+        Restore session cookies saved by a previous successful login.
+
+        Returns:
+            bool: True if cookies were restored, False otherwise
+        """
+        cache_path = _cookie_cache_path()
+        try:
+            entries = json.loads(cache_path.read_text(encoding='utf-8'))
+            # Validate every entry before touching the jar, so a bad file restores nothing
+            if not isinstance(entries, list) or not all(
+                isinstance(entry, dict) and all(isinstance(entry.get(field), str) for field in _COOKIE_FIELDS)
+                for entry in entries
+            ):
+                raise ValueError("expected a list of cookie entries")
+            for entry in entries:
+                self.session.cookies.set(entry['name'], entry['value'], domain=entry['domain'], path=entry['path'])
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"⚠️ Ignoring unreadable cookie cache {cache_path}: {type(e).__name__}")
+            return False
+
+        logger.debug(f"🍪 Restored {len(entries)} cached cookies")
+        return True
+
+    def _save_cookies(self) -> None:
+        """Persist the session cookies (owner-only permissions) for the next run"""
+        cache_path = _cookie_cache_path()
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            entries = [
+                {'name': cookie.name, 'value': cookie.value or '', 'domain': cookie.domain, 'path': cookie.path}
+                for cookie in self.session.cookies
+            ]
+            fd = os.open(cache_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as cache_file:
+                json.dump(entries, cache_file)
+        except (OSError, TypeError, AttributeError) as e:
+            logger.warning(f"⚠️ Could not save cookie cache {cache_path}: {type(e).__name__}")
 
     def get_credentials(self) -> Tuple[str, str]:
         """
@@ -125,8 +421,10 @@ class MirCrewLogin:
         Raises:
             ValueError: If credentials are missing or invalid
         """
-        username = os.getenv('MIRCREW_USERNAME')
-        password = os.getenv('MIRCREW_PASSWORD')
+        _load_env()
+        with _ENV_LOCK:
+            username = os.getenv('MIRCREW_USERNAME')
+            password = os.getenv('MIRCREW_PASSWORD')
 
         # Enhanced security: Avoid logging any sensitive information
         if not username:
@@ -150,16 +448,19 @@ class MirCrewLogin:
 
         return username, password
 
-    def _establish_session(self, max_retries: int = 3) -> bool:
+    def _establish_session(self, max_retries: int = 3, prefetch_login: bool = False) -> bool:
         """
         Establish a natural browsing session by visiting the homepage first.
 
         Args:
             max_retries: Maximum number of retry attempts
+            prefetch_login: Start fetching the login page while the human-like pause runs
 
         Returns:
             bool: True if session established successfully, False otherwise
         """
+        self._prefetched_login = None
+
         for attempt in range(max_retries):
             try:
                 logger.debug(f"Establishing browsing session (attempt {attempt + 1}/{max_retries})...")
@@ -173,8 +474,11 @@ class MirCrewLogin:
 
                 if response.status_code == 200:
                     logger.debug("✅ Homepage visit successful - session established")
+                    if prefetch_login:
+                        self._prefetch_login_page()
                     # Wait a moment to simulate human behavior
-                    time.sleep(random.uniform(0.5, 1.5))
+                    if self._stealth:
+                        time.sleep(random.uniform(0.5, 1.5))
                     return True
                 else:
                     logger.warning(f"⚠️ Homepage visit returned: {response.status_code}")
@@ -203,52 +507,91 @@ class MirCrewLogin:
         logger.warning("⚠️ Session establishment completed with warnings")
         return True
 
-    def _extract_form_data_precise(self, html_content: str) -> Dict[str, str]:
+    def _log_connection_reuse(self, response: requests.Response) -> None:
         """
-        Precise form data extraction targeting the login form specifically
-        
+        Log how many connections the login flow opened, to confirm keep-alive reuse.
+
         Args:
-            html_content: HTML content of the login page
-            
+            response: Login response, read for the connection pool that served it
+        """
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        pool = getattr(response.raw, '_pool', None)
+        if pool is None:
+            return
+        logger.debug(f"🔌 Connection pool: {pool.num_connections} connection(s) opened for {pool.num_requests} request(s)")
+
+    def _prefetch_login_page(self) -> None:
+        """Fetch the login page on a worker thread so it overlaps the anti-detection pause"""
+        if self._prefetch_executor is None:
+            self._prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='mircrew-login')
+
+        self._prefetched_login = self._prefetch_executor.submit(
+            self.session.get, self.login_url, allow_redirects=True, timeout=20, stream=True
+        )
+
+    def _release_prefetch(self) -> None:
+        """Close a prefetched login page nobody read and stop the prefetch worker"""
+        prefetched, self._prefetched_login = self._prefetched_login, None
+        if prefetched is not None and not prefetched.cancel():
+            # A streamed response holds its pooled connection until closed
+            prefetched.add_done_callback(_close_prefetched_response)
+
+        if self._prefetch_executor is not None:
+            self._prefetch_executor.shutdown(wait=False)
+            self._prefetch_executor = None
+
+    def _fetch_login_page(self) -> requests.Response:
+        """
+        Return the login page, reusing the prefetched response when one is pending.
+
         Returns:
-            Dict[str, str]: Dictionary of form fields and their values
+            requests.Response: Login page response
+
+        Raises:
+            requests.exceptions.RequestException: If the login page cannot be fetched
         """
-        soup = BeautifulSoup(html_content, 'html.parser')
-        form_data = {}
-
-        # Find the login form - try multiple strategies
-        login_form = None
-
-        # Strategy 1: Look for form with login action
-        login_form = soup.find('form', action=lambda x: x is not None and 'mode=login' in x)
-
-        # Strategy 2: Look for form containing username input
-        if not login_form:
-            forms = soup.find_all('form')
-            for form in forms:
-                if isinstance(form, Tag):
-                    if form.find('input', {'name': 'username'}):
-                        login_form = form
-                        break
-
-        # Strategy 3: Fallback to any form
-        if not login_form:
-            login_form = soup.find('form')
-
-        if login_form and isinstance(login_form, Tag):
-            # Extract all inputs from the form
-            inputs = login_form.find_all('input')
-            for input_field in inputs:
-                if isinstance(input_field, Tag):
-                    if hasattr(input_field, 'get'):
-                        name = input_field.get('name')
-                        value = input_field.get('value', '')
-                        if name:
-                            form_data[name] = value or ''
+        prefetched, self._prefetched_login = self._prefetched_login, None
+        if prefetched is not None:
+            try:
+                return prefetched.result()
+            except requests.exceptions.RequestException as e:
+                logger.debug(f"⚠️ Prefetched login page failed ({type(e).__name__}), fetching again")
+
+        return self.session.get(self.login_url, allow_redirects=True, timeout=20, stream=True)
 
+    def _read_login_form(self, response: requests.Response) -> Dict[str, str]:
+        """
+        Stream the login page through an incremental parser and stop parsing at the login form.
+
+        Args:
+            response: Streamed login page response
+
+        Returns:
+            Dict[str, str]: Dictionary of form fields and their values
+        """
+        parser = etree.HTMLPullParser(events=('end',), tag='form')
+        chunks = response.iter_content(chunk_size=_LOGIN_PAGE_CHUNK)
+
+        for chunk in chunks:
+            parser.feed(chunk)
+            for _, form in parser.read_events():
+                if 'mode=login' in (form.get('action') or ''):
+                    form_data = _form_inputs(form)
+                    # Drain the remainder unparsed so the connection stays reusable
+                    for _ in chunks:
+                        pass
+                    logger.debug(f"Extracted {len(form_data)} fields from streamed login form")
+                    return form_data
+
+        # No form posting to mode=login: apply the remaining strategies to the whole page
+        try:
+            tree = parser.close()
+        except etree.LxmlError:
+            return {}
+        form_data = _extract_login_form_fields(tree)
         logger.debug(f"Extracted {len(form_data)} fields from login form")
-        result = {str(k): str(v) for k, v in form_data.items()}
-        return result
+        return form_data
 
     def _prepare_login_payload(self, username: str, password: str, form_data: Dict[str, str]) -> Dict[str, str]:
         """
@@ -265,26 +608,14 @@ class MirCrewLogin:
         if not isinstance(form_data, dict):
             raise TypeError("form_data must be a dictionary")
 
-        payload = {}
-
         # Core login fields - these must be first in correct order
-        payload['username'] = str(username).strip()
-        payload['password'] = str(password)
-        payload['autologin'] = '1'  # Remember login
-        payload['viewonline'] = '1'  # Show online status
-        payload['login'] = 'Login'   # Submit button value
+        payload = {'username': str(username).strip(), 'password': str(password), **_PAYLOAD_TEMPLATE}
 
         # Add hidden CSRF protection fields in specific order
-        hidden_fields = ['sid', 'form_token', 'creation_time']
-        for field in hidden_fields:
-            if field in form_data and form_data[field]:
-                payload[field] = str(form_data[field]).strip()
+        payload.update((field, str(form_data[field]).strip()) for field in _HIDDEN_FIELDS if form_data.get(field))
 
         # Add redirect field
-        if 'redirect' in form_data and form_data['redirect']:
-            payload['redirect'] = str(form_data['redirect']).strip()
-        else:
-            payload['redirect'] = 'index.php'  # Default redirect
+        payload['redirect'] = str(form_data.get('redirect') or 'index.php').strip()
 
         logger.debug(f"Prepared login payload with {len(payload)} fields")
         return payload
@@ -294,7 +625,7 @@ class MirCrewLogin:
         Enhanced login with comprehensive anti-detection measures and exponential backoff.
 
         Args:
-            max_attempts: Maximum login attempts (default: 10)
+            max_attempts: Maximum login attempts (default: 10, unrecognised failures abort after 3)
 
         Returns:
             bool: True if login successful, False otherwise
@@ -307,12 +638,30 @@ class MirCrewLogin:
 
             username, password = self.get_credentials()
 
+            # Cookies from a previous run may still carry a valid session
+            if self._cookies_restored:
+                self._cookies_restored = False
+                if self.is_logged_in():
+                    logger.info("✅ SUCCESS: Reused cached session cookies")
+                    self._sid = self._session_id_from_cookies()
+                    return True
+                self.session.cookies.clear()
+
+            unknown_failures = 0
+            transport_error = False
+            csrf_rejected = False
+            # Stale form tokens just need a fresh login page: retry those at once, but
+            # never twice in a row, so a persistent problem still gets backed off
+            retry_now = False
+            retried_now = False
+
             for attempt in range(max_attempts):
-                if attempt > 0:
-                    # Exponential backoff with jitter: base_delay * (2^attempt) + random_jitter
-                    base_delay = min(2.0 * (2 ** (attempt - 1)), 30.0)  # Cap at 30 seconds, fix exponent
-                    jitter = random.uniform(0.1, 2.0)
-                    delay = base_delay + jitter
+                skip_backoff = retry_now and not retried_now
+                retried_now, retry_now = skip_backoff, False
+
+                if attempt > 0 and not skip_backoff:
+                    # Exponential backoff with jitter, capped so retries stay responsive
+                    delay = min(2.0 * (1.5 ** attempt) + random.uniform(0, 1.0), _MAX_BACKOFF_DELAY)
 
                     logger.info(f"⏳ Exponential backoff: attempt {attempt + 1}, waiting {delay:.1f}s")
                     time.sleep(delay)
@@ -321,35 +670,49 @@ class MirCrewLogin:
 
                 # Establish natural session state (once per run)
                 if attempt == 0:
-                    if not self._establish_session():
+                    if not self._establish_session(prefetch_login=True):
                         logger.warning("⚠️ Session establishment failed, continuing with login attempt")
 
-                # Fresh session for each attempt after the first
+                # Reset login state for each attempt after the first
                 if attempt > 0:
-                    self.session = requests.Session()
+                    if transport_error:
+                        # Pooled sockets may be dead after a connection error - start over
+                        self.session.close()
+                        self.session = requests.Session()
+                        mount_session_adapter(self.session)
+                        transport_error = False
+                    else:
+                        # Keep the connection pool (and its TLS sessions), drop only the cookies
+                        self.session.cookies.clear()
                     self._setup_session_headers()
-                    if not self._establish_session():
-                        logger.warning("⚠️ Session re-establishment failed")
-                        continue
+                    # Only a rejected form needs the homepage visit again
+                    if csrf_rejected:
+                        csrf_rejected = False
+                        if not self._establish_session(prefetch_login=True):
+                            logger.warning("⚠️ Session re-establishment failed")
+                            continue
 
                 try:
                     # Fetch login page with enhanced error handling
                     logger.info("📄 Fetching login page...")
-                    response = self.session.get(self.login_url, allow_redirects=True, timeout=20)
+                    response = self._fetch_login_page()
 
                     if response.status_code != 200:
                         logger.warning(f"❌ Login page returned {response.status_code}")
+                        response.close()
                         continue
 
                 except requests.exceptions.RequestException as e:
                     logger.warning(f"❌ Network error: {str(e)}")
+                    transport_error = isinstance(e, requests.exceptions.ConnectionError)
                     continue
 
                 # Extract form data precisely
-                form_data = self._extract_form_data_precise(response.text)
+                form_data = self._read_login_form(response)
 
                 if not form_data.get('form_token'):
                     logger.warning("⚠️ Missing form_token, retrying...")
+                    retry_now = True
                     continue
 
                 # Prepare payload
@@ -358,18 +721,28 @@ class MirCrewLogin:
                 logger.info("🚀 Submitting login credentials")
 
                 # Submit with anti-detection timing
-                time.sleep(random.uniform(0.5, 1.5))
+                if self._stealth:
+                    time.sleep(random.uniform(0.5, 1.5))
 
                 try:
+                    # Stream the response so the body is only downloaded when we inspect it
                     login_response = self.session.post(
                         self.login_url,
                         data=login_payload,
                         allow_redirects=True,
-                        timeout=20
+                        timeout=20,
+                        stream=True
                     )
 
                 except requests.exceptions.RequestException as e:
                     logger.warning(f"❌ Login request failed: {type(e).__name__}: {str(e)}")
+                    transport_error = isinstance(e, requests.exceptions.ConnectionError)
+                    continue
+
+                # Non-200 answers are decided on the status line alone - drop the body unread
+                if login_response.status_code != 200:
+                    logger.warning(f"❌ Login request returned {login_response.status_code}")
+                    login_response.close()
                     continue
 
                 logger.info(f"📋 Login response: {login_response.status_code} → login redirect detected")
@@ -379,26 +752,36 @@ class MirCrewLogin:
 
                 if success:
                     logger.info(f"✅ SUCCESS: Login completed on attempt {attempt + 1}")
+                    self._log_connection_reuse(login_response)
+                    # phpBB issues a new session on login, so read it from the cookies rather than the form
+                    self._sid = self._session_id_from_cookies()
+                    self._save_cookies()
                     return True
 
                 # Enhanced error detection
-                response_lower = login_response.text.lower()
+                response_body = login_response.content
 
-                if 'il form inviato non è valido' in response_lower:
+                if _CSRF_REJECTED_RE.search(response_body):
                     logger.warning("🔄 CSRF token expired, fresh retry needed")
+                    csrf_rejected = True
+                    retry_now = True
                     continue
-                elif any(error in response_lower for error in ['captcha', 'verification', 'robot']):
+                elif _ANTI_BOT_RE.search(response_body):
                     logger.warning("🤖 Anti-bot protection detected")
                     time.sleep(random.uniform(10, 20))  # Longer delay for anti-bot
                     continue
-                elif any(error in response_lower for error in ['ban', 'suspended', 'blocked']):
+                elif _BLOCKED_RE.search(response_body):
                     logger.error("🚫 Account appears blocked/suspended")
                     return False
-                elif 'modo manutenzione' in response_lower or 'maintenance' in response_lower:
+                elif _MAINTENANCE_RE.search(response_body):
                     logger.error("🛠️ Site is in maintenance mode")
                     return False
                 else:
-                    logger.warning("⚠️ Unknown error condition")
+                    unknown_failures += 1
+                    logger.warning(f"⚠️ Unknown error condition ({unknown_failures}/{_MAX_UNKNOWN_FAILURES})")
+                    if unknown_failures >= _MAX_UNKNOWN_FAILURES:
+                        logger.error("💀 LOGIN FAILED: Repeated unrecognised failures, giving up")
+                        return False
 
             # If we get here, all attempts failed
             logger.error(f"💀 LOGIN FAILED: All {max_attempts} attempts exhausted")
@@ -413,6 +796,8 @@ class MirCrewLogin:
         except Exception as e:
             logger.error(f"💥 Critical login error: {type(e).__name__}: {str(e)}")
             return False
+        finally:
+            self._release_prefetch()
 
     def validate_login(self, response: requests.Response) -> bool:
         """
@@ -429,39 +814,21 @@ class MirCrewLogin:
                 logger.error(f"❌ Http error: {response.status_code}")
                 return False
 
-            response_lower = response.text.lower()
-
-            # Check for error messages first
-            soup = BeautifulSoup(response.text, 'html.parser')
+            # Check for error messages first - only worth a parse when a
+            # failure phrase appears somewhere in the page
             error_elements = []
-            for tag in ['div', 'span', 'p']:
-                for element in soup.find_all(tag):
-                    if not isinstance(element, Tag):
-                        continue
-
-                    element_class = element.get('class', None)
-                    if element_class and any('error' in cls.lower() or 'danger' in cls.lower() for cls in element_class):
-                        error_text = element.get_text().strip()
-                        if error_text:
-                            logger.error(f"📄 Website error: {error_text}")
-                            error_elements.append(error_text.lower())
+            body = response.content
+            tree = _parse_html(body) if _FAILURE_BYTES_RE.search(body) else None
+            if tree is not None:
+                for element in _ERROR_ELEMENTS_XPATH(tree):
+                    error_text = element.text_content().strip()
+                    if error_text:
+                        logger.error(f"📄 Website error: {error_text}")
+                        error_elements.append(error_text)
 
             # Error message checks
-            failure_indicators = [
-                'login unsuccessful',
-                'invalid username',
-                'wrong password',
-                'authentication failed',
-                'il nome utente',
-                'la password',
-                'accesso negato',
-                'non autorizzato',
-                'validation failed',
-                'form not valid'
-            ]
-
             for error in error_elements:
-                if any(indicator in error for indicator in failure_indicators):
+                if _FAILURE_RE.search(error):
                     logger.error("❌ Login failed: credential error")
                     return False
 
@@ -469,23 +836,13 @@ class MirCrewLogin:
             if 'mode=login' not in response.url:
                 logger.info("🔄 Redirected from login page")
                 # Check for success content
-                success_indicators = [
-                    'logout',
-                    'welcome',
-                    'my account',
-                    'profile',
-                    'logged in as',
-                    'benvenuto',  # Italian "welcome"
-                    'profilo'     # Italian "profile"
-                ]
-
-                for indicator in success_indicators:
-                    if indicator in response_lower:
-                        logger.info(f"✅ Login successful: {indicator}")
-                        return True
+                match = _SUCCESS_RE.search(body)
+                if match:
+                    logger.info(f"✅ Login successful: {match.group(0).decode('ascii').lower()}")
+                    return True
 
                 # If redirected to main content but no clear indicator, assume success
-                if any(keyword in response_lower for keyword in ['forum', 'threads', 'posts', 'community']):
+                if _MAIN_CONTENT_RE.search(body):
                     logger.info("✅ Login successful: main content detected")
                     return True
 
@@ -518,47 +875,57 @@ class MirCrewLogin:
         try:
             logger.debug("🔍 Checking login session validity...")
 
+            # phpBB bounces registered users away from the login page, so a
+            # body-less redirect answers the common "still logged in" case
+            probe = self.session.head(
+                f"{self.base_url}/ucp.php?mode=login",
+                allow_redirects=False,
+                timeout=5
+            )
+            if probe.status_code in _REDIRECT_STATUSES and 'mode=login' not in probe.headers.get('Location', ''):
+                logger.debug("✅ Login page redirected away - session valid")
+                return True
+
+            # Ambiguous answer: fall back to scanning the index page
             response = self.session.get(
                 f"{self.base_url}/index.php",
                 allow_redirects=True,
-                timeout=10
+                timeout=10,
+                stream=True
             )
 
             # HTTP error response
             if response.status_code != 200:
                 logger.debug(f"⚠️ Session check failed with HTTP {response.status_code}")
+                response.close()
                 return False
 
             # Redirecting to login = not logged in
             if 'login' in response.url.lower() or 'ucp.php' in response.url:
                 logger.debug("⚠️ Redirected to login page - session expired")
+                response.close()
                 return False
 
-            # Check response content for login indicators
-            response_lower = response.text.lower()
-
-            # Success indicators with Italian translations
-            success_indicators = [
-                'logout', 'my account', 'profile', 'logged in as',
-                'benvenuto', 'profilo', 'disconnetti',  # Italian
-                'forum', 'threads', 'posts'  # Forum content indicators
-            ]
+            # Only the page header is needed for the indicator scan; the
+            # phpBB navbar (with the logout link) sits well inside it.
+            chunks = response.iter_content(chunk_size=_SESSION_PROBE_BYTES)
+            head = next(chunks, b'')
 
-            # Check for success indicators
-            if any(indicator in response_lower for indicator in success_indicators):
-                logger.debug("✅ Found success indicators - session valid")
+            # Check for the logout link
+            if _SESSION_OK_RE.search(head):
+                logger.debug("✅ Found logout link - session valid")
+                response.close()
                 return True
 
-            # Check for login form presence (indicates not logged in)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            login_form = soup.find('form', action=lambda x: bool(x) and 'login' in x.lower())
-            if login_form:
-                logger.debug("⚠️ Login form found - not logged in")
-                return False
+            # Not in the header: read the rest of the page before deciding
+            body = head + b''.join(chunks)
+            if _SESSION_OK_RE.search(body):
+                logger.debug("✅ Found logout link - session valid")
+                return True
 
-            # Default: assume logged in if we get here without clear indicators
-            logger.debug("⚠️ No clear indicators found - assuming logged in")
-            return True
+            # Guest pages also mention forums, threads and posts; only a logout link counts
+            logger.debug("⚠️ No logout link found - not logged in")
+            return False
 
         except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
             logger.warning(f"⚠️ Network error during session check: {type(e).__name__}")
@@ -567,6 +934,23 @@ class MirCrewLogin:
             logger.error(f"❌ Error checking session validity: {type(e).__name__}: {str(e)}")
             return False
 
+    def _session_id_from_cookies(self) -> str:
+        """
+        Find the phpBB session ID in the cookie jar.
+
+        Returns:
+            str: Session ID, or an empty string if no session cookie is set
+        """
+        # Try to get session ID from cookies
+        session_id = self.session.cookies.get('phpbb3_34c6d_sid', '')
+        if not session_id:
+            # Try other common phpBB session cookie names
+            for cookie_name, cookie_value in self.session.cookies.items():
+                if isinstance(cookie_name, str) and 'sid' in cookie_name.lower():
+                    session_id = cookie_value
+                    break
+        return session_id or ''
+
     def logout(self) -> bool:
         """
         Perform logout
@@ -575,20 +959,18 @@ class MirCrewLogin:
             bool: True if logout successful, False otherwise
         """
         try:
-            # Try to get session ID from cookies
-            session_id = self.session.cookies.get('phpbb3_34c6d_sid', '')
-            if not session_id:
-                # Try other common phpBB session cookie names
-                for cookie_name, cookie_value in self.session.cookies.items():
-                    if isinstance(cookie_name, str) and 'sid' in cookie_name.lower():
-                        session_id = cookie_value
-                        break
-            
+            session_id = self._sid or self._session_id_from_cookies()
+
             logout_url = f"{self.base_url}/ucp.php?mode=logout&sid={session_id}"
-            response = self.session.get(logout_url, allow_redirects=True, timeout=10)
+            response = self.session.get(logout_url, allow_redirects=False, timeout=10)
             
-            if response.status_code == 200:
+            if response.status_code == 200 or response.status_code in _REDIRECT_STATUSES:
                 logger.info("👋 Logged out successfully")
+                self._sid = ''
+                try:
+                    _cookie_cache_path().unlink()
+                except OSError:
+                    pass
                 return True
             else:
                 logger.warning(f"⚠️ Logout request returned {response.status_code}")
@@ -599,10 +981,76 @@ class MirCrewLogin:
             return False
 
 
+def _check_login(login_client: MirCrewLogin) -> Tuple[bool, bool]:
+    """
+    Run the network part of the test suite: login, then session persistence.
+
+    Args:
+        login_client: Client whose credentials were already validated
+
+    Returns:
+        Tuple[bool, bool]: (login succeeded, session persisted)
+    """
+    # Test 2: Login attempt
+    logger.info("🔐 Test 2: Attempting login...")
+    if not login_client.login():
+        logger.error("❌ Login test FAILED")
+        return False, False
+    logger.info("✅ Login test PASSED")
+
+    # Test 3: Session persistence
+    logger.info("🔄 Test 3: Testing session persistence...")
+    time.sleep(2)  # Brief pause before checking
+    if login_client.is_logged_in():
+        logger.info("✅ Session persistence test PASSED")
+        return True, True
+
+    logger.warning("⚠️ Session persistence test FAILED")
+    return True, False
+
+
+def _check_error_handling() -> bool:
+    """
+    Check that missing credentials are rejected (Test 4).
+
+    Returns:
+        bool: True if the missing credentials raised ValueError
+    """
+    logger.info("🚨 Test 4: Testing error handling...")
+    try:
+        # Hold the lock so a concurrent login never sees the credentials missing
+        with _ENV_LOCK:
+            # Test with missing credentials
+            original_username = os.environ.pop('MIRCREW_USERNAME', None)
+            original_password = os.environ.pop('MIRCREW_PASSWORD', None)
+
+            error_client = MirCrewLogin()
+            try:
+                error_client.get_credentials()
+            except ValueError:
+                logger.debug("✅ Error handling correctly caught missing credentials")
+                logger.info("✅ Error handling test PASSED")
+                return True
+            finally:
+                # Restore original credentials
+                if original_username:
+                    os.environ['MIRCREW_USERNAME'] = original_username
+                if original_password:
+                    os.environ['MIRCREW_PASSWORD'] = original_password
+
+    except Exception as e:
+        logger.warning(f"⚠️ Error handling test issue: {str(e)}")
+
+    return False
+
+
 def test_login() -> bool:
     """
     Comprehensive login test suite with multiple validation steps.
 
+    The network checks (login, session persistence) run concurrently with
+    the offline error-handling check.
+
     Returns:
         bool: True if all tests pass, False otherwise
     """
@@ -619,7 +1067,7 @@ def test_login() -> bool:
     try:
         # Test 1: Credential validation
         logger.info("📋 Test 1: Validating credentials...")
-        login_client = MirCrewLogin()
+        login_client = MirCrewLogin(stealth=False)
 
         try:
             username, password = login_client.get_credentials()
@@ -629,56 +1077,15 @@ def test_login() -> bool:
             logger.error(f"❌ Credentials validation FAILED: {str(e)}")
             return False
 
-        # Test 2: Login attempt
-        logger.info("🔐 Test 2: Attempting login...")
-        success = login_client.login()
-
-        if success:
-            test_results['login_success'] = True
-            logger.info("✅ Login test PASSED")
-        else:
-            logger.error("❌ Login test FAILED")
-            return False
-
-        # Test 3: Session persistence
-        logger.info("🔄 Test 3: Testing session persistence...")
-        time.sleep(2)  # Brief pause before checking
-        if login_client.is_logged_in():
-            test_results['session_persistence'] = True
-            logger.info("✅ Session persistence test PASSED")
-        else:
-            logger.warning("⚠️ Session persistence test FAILED")
-            test_results['session_persistence'] = False
-
-        # Test 4: Error handling simulation
-        logger.info("🚨 Test 4: Testing error handling...")
-        try:
-            # Test with missing credentials
-            original_username = os.environ.get('MIRCREW_USERNAME')
-            original_password = os.environ.get('MIRCREW_PASSWORD')
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix='mircrew-test') as executor:
+            login_future = executor.submit(_check_login, login_client)
+            error_future = executor.submit(_check_error_handling)
 
-            # Temporarily remove credentials
-            if 'MIRCREW_USERNAME' in os.environ:
-                os.environ.pop('MIRCREW_USERNAME')
-            if 'MIRCREW_PASSWORD' in os.environ:
-                os.environ.pop('MIRCREW_PASSWORD')
+            test_results['error_handling'] = error_future.result()
+            test_results['login_success'], test_results['session_persistence'] = login_future.result()
 
-            error_client = MirCrewLogin()
-            try:
-                error_client.get_credentials()
-            except ValueError:
-                logger.debug("✅ Error handling correctly caught missing credentials")
-                test_results['error_handling'] = True
-                logger.info("✅ Error handling test PASSED")
-            finally:
-                # Restore original credentials
-                if original_username:
-                    os.environ['MIRCREW_USERNAME'] = original_username
-                if original_password:
-                    os.environ['MIRCREW_PASSWORD'] = original_password
-
-        except Exception as e:
-            logger.warning(f"⚠️ Error handling test issue: {str(e)}")
+        if not test_results['login_success']:
+            return False
 
         # Calculate test score
         passed_tests = sum(test_results.values())
@@ -708,6 +1115,5 @@ def test_login() -> bool:
         logger.error(f"💥 Unexpected error during login test: {type(e).__name__}: {str(e)}")
         return False
 
-
 if __name__ == "__main__":
     test_login()
\ No newline at end of file
@@ -9,10 +9,14 @@ python mircrew_indexer.py -q "search query" [-season N] [-ep N]
 
 import sys
 import os
+import logging
 import argparse
 import re
+import threading
+import time
 import yaml
 from pathlib import Path
+from types import MappingProxyType
 
 # Set up centralized logging
 from ..utils.logging_utils import setup_logging, get_logger
@@ -20,24 +24,384 @@ from ..utils.logging_utils import setup_logging, get_logger
 # Configure logging with centralized config
 setup_logging()
 logger = get_logger(__name__)
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Optional
+from functools import lru_cache
+from io import StringIO
+from typing import AbstractSet, Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse, parse_qs
+from urllib.parse import urljoin, unquote_plus
+from xml.sax.saxutils import escape as xml_escape
 from requests import Session
+from lxml import etree
 
 from .auth import MirCrewLogin
 from .magnet_unlock import MagnetUnlocker
 
 # Logging is now configured centrally in setup_logging() above
 
+# Season/episode markers stripped from search keywords (mircrew.yml keyword processing)
+_SEASON_EPISODE_RE = re.compile(r'\b(?:[SE]\d{1,4}){1,2}\b')
+# Search result row tags (li/div whose class contains 'row' or 'bg2'),
+# the topic title link inside a row, and an element's full text
+_RESULT_ROW_TAGS = ('li', 'div')
+_TOPIC_TITLE_XPATH = etree.XPath(
+    ".//a[contains(concat(' ', normalize-space(@class), ' '), ' topictitle ')][1]"
+)
+_ELEMENT_TEXT_XPATH = etree.XPath('string()')
+# Opening <html tag, matched case-insensitively on the raw page bytes
+_HTML_TAG_BYTES_RE = re.compile(rb'<html', re.IGNORECASE)
+
+# Bytes of the search page handed to the streaming parser at a time
+_SEARCH_PAGE_CHUNK = 16 * 1024
+_DEBUG_SNIFF_BYTES = 4096
+# Forum ID query parameter of a thread URL (viewtopic.php?f=25&t=1234)
+_FORUM_ID_RE = re.compile(r'[?&]f=(\d+)')
+# Forum ID inside size_default case rules like 'a[href*="f=25"]'
+_CASE_RULE_FORUM_RE = re.compile(r'f=(\d+)')
+
+# Size in a thread title: a standalone "1.5GB" / "1,5 GB" / "[500MB]", else any digits glued
+# to a unit ("x264.2GB"). The bracketed and Italian forms are already standalone matches.
+_TITLE_SIZE_RE = re.compile(r'\b(\d+(?:[\.,]\d{1,2})?)\s*(GB|MB|TB|KiB|MiB|GiB|B)\b', re.IGNORECASE)
+_TITLE_SIZE_LOOSE_RE = re.compile(r'(\d+(?:[\.,]\d{1,2})?)(GB|MB|TB|KiB|MiB|GiB|B)', re.IGNORECASE)
+
+# Normalised size strings: number plus optional unit, or just any number as a fallback
+_SIZE_STRING_RE = re.compile(r'^(\d+(?:\.\d+)?)([KMGT]I?B?)?$')
+_SIZE_NUMBER_RE = re.compile(r'(\d+(?:\.\d+)?)')
+
+def _is_result_row(element: etree._Element) -> bool:
+    """Check whether a li/div element is a search result row"""
+    css_class = element.get('class') or ''
+    return 'row' in css_class or 'bg2' in css_class
+
+def _iter_result_rows(chunks: Iterable[Union[str, bytes]]) -> Iterator[etree._Element]:
+    """
+    Yield search result rows while the page is still being parsed.
+
+    Rows are yielded as their closing tag is parsed, so the caller can stop
+    before the rest of the page is parsed. Once the caller has moved on, an
+    outermost row is cleared and detached so the tree never holds more than
+    the row being read.
+
+    Args:
+        chunks: The page as successive text or byte chunks (not mixed)
+
+    Yields:
+        etree._Element: Result row elements
+    """
+    parser = etree.HTMLPullParser(events=('end',), tag=_RESULT_ROW_TAGS)
+
+    def rows() -> Iterator[etree._Element]:
+        for _, element in parser.read_events():
+            if not _is_result_row(element):
+                continue
+            yield element
+            if not any(_is_result_row(a) for a in element.iterancestors(*_RESULT_ROW_TAGS)):
+                element.clear(keep_tail=True)
+                parent = element.getparent()
+                if parent is not None:
+                    parent.remove(element)
+
+    for chunk in chunks:
+        if chunk:
+            parser.feed(chunk)
+            yield from rows()
+
+    try:
+        parser.close()
+    except etree.LxmlError:
+        # Nothing was fed, or the page was cut short
+        return
+    yield from rows()
+
+# Comprehensive unit mapping with both decimal (1000^x) and binary (1024^x) variants
+_SIZE_MULTIPLIERS = {
+    # Binary units ( power of 2 )
+    'KIB': 1024,
+    'MIB': 1024**2,
+    'GIB': 1024**3,
+    'TIB': 1024**4,
+
+    # Decimal units ( power of 10 )
+    'KB': 10**3,
+    'MB': 10**6,
+    'GB': 10**9,
+    'TB': 10**12,
+
+    # Legacy units (assuming decimal)
+    'K': 10**3,
+    'M': 10**6,
+    'G': 10**9,
+    'T': 10**12,
+
+    # Special cases
+    'B': 1,       # Just bytes
+}
+
+# Byte counts for the default sizes in mircrew.yml and the code fallbacks; must agree with _size_to_bytes()
+_SIZE_FAST = MappingProxyType({
+    '1GB': 1_000_000_000,
+    '2GB': 2_000_000_000,
+    '10GB': 10_000_000_000,
+    '512MB': 512_000_000,
+    '1GIB': 1024**3,
+})
+
+@lru_cache(maxsize=256)
+def _size_to_bytes(size_str: str) -> int:
+    """
+    Convert a non-empty size string to bytes.
+
+    Cached because nearly every magnet carries one of a handful of
+    config default sizes ('1GB', '2GB', ...).
+
+    Args:
+        size_str: Size string like '1.5GB', '500MB', '1,5 GB'
+
+    Returns:
+        int: Size in bytes
+    """
+    # Clean the string and extract components
+    size_str = size_str.upper().strip()
+
+    # Handle Italian decimal separator
+    size_str = size_str.replace(',', '.')
+
+    # Match number and unit
+    match = _SIZE_STRING_RE.match(size_str)
+
+    if match:
+        value_str, unit = match.groups()
+        value = float(value_str)
+
+        if unit and unit in _SIZE_MULTIPLIERS:
+            multiplier = _SIZE_MULTIPLIERS[unit]
+        elif unit:
+            # Unknown unit, assume it's bytes if just a number
+            logger.debug(f"Unknown unit '{unit}', treating as bytes")
+            multiplier = 1
+        else:
+            # No unit specified, assume GB for large numbers, MB for smaller
+            multiplier = (10**9 if value < 1000 else 10**6)
+
+        try:
+            result = int(value * multiplier)
+            return max(result, 1)  # Ensure at least 1 byte
+        except (OverflowError, ValueError):
+            logger.warning(f"Size conversion overflow for '{size_str}', using default 1GB")
+            return 1073741824
+
+    # We couldn't parse the size, try to extract a number and assume GB
+    try:
+        # Look for any number in the string
+        number_match = _SIZE_NUMBER_RE.search(size_str)
+        if number_match:
+            value = float(number_match.group(1))
+            # Assume GB for large numbers, MB for smaller
+            multiplier = 10**9 if value < 100 else 10**6
+            return int(value * multiplier)
+    except (ValueError, OverflowError):
+        pass
+
+    # Final fallback
+    logger.warning(f"Could not parse size string '{size_str}', using default 1GB")
+    return 1073741824
+
+# Quote entities added to saxutils.escape()'s &, < and > so values are also attribute-safe
+_XML_QUOTE_ENTITIES = {'"': '&quot;', "'": '&apos;'}
+
+# Fixed start and end of every Torznab feed; items are written line by line in between
+_TORZNAB_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<rss version="2.0" xmlns:torznab="http://torznab.com/schemas/2015/feed">\n'
+    '<channel>\n'
+)
+_TORZNAB_FOOTER = '</channel>\n</rss>'
+
+# One Torznab <item>; every %(...)s value must already be XML-escaped
+_TORZNAB_ITEM_TEMPLATE = (
+    '<item>\n'
+    '<title>%(title)s</title>\n'
+    '<guid>%(guid)s</guid>\n'
+    '<link>%(link)s</link>\n'
+    '<enclosure url="%(download_url)s" type="application/x-bittorrent" length="%(size_bytes)s"/>\n'
+    '<comments>%(comments)s</comments>\n'
+    '<pubDate>%(pub_date)s</pubDate>\n'
+    '<category>%(category)s</category>\n'
+    '<size>%(size_bytes)s</size>\n'
+    '<description>%(description)s</description>\n'
+    # Torznab-specific attributes
+    '<torznab:attr name="category" value="%(category_id)s"/>\n'
+    '<torznab:attr name="size" value="%(size_bytes)s"/>\n'
+    '<torznab:attr name="seeders" value="1"/>\n'
+    '<torznab:attr name="peers" value="2"/>\n'
+    '<torznab:attr name="downloadvolumefactor" value="0"/>\n'
+    '<torznab:attr name="uploadvolumefactor" value="1"/>\n'
+    '</item>\n'
+)
+
+# C-accelerated YAML loader when PyYAML was built with libyaml
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# Fallback forum id -> category mappings and per-category default sizes, used when
+# mircrew.yml is missing or does not define them
+_DEFAULT_CAT_MAPPINGS = MappingProxyType({
+    '25': 'Movies',
+    '26': 'Movies',
+    '51': 'TV',
+    '52': 'TV',
+    '29': 'TV/Documentary',
+    '30': 'TV',
+    '31': 'TV',
+    '33': 'TV/Anime',
+    '34': 'Movies/Other',
+    '35': 'TV/Anime',
+    '36': 'Movies/Other',
+    '37': 'TV/Anime',
+    '39': 'Books',
+    '40': 'Books/EBook',
+    '41': 'Audio/Audiobook',
+    '42': 'Books/Comics',
+    '43': 'Books/Mags',
+    '45': 'Audio',
+    '46': 'Audio'
+})
+_DEFAULT_SIZES = MappingProxyType({
+    'Movies': '10GB',
+    'TV': '2GB',
+    'TV/Documentary': '2GB',
+    'Books': '512MB',
+    'Audio': '512MB'
+})
+
+# Seconds a successful login is trusted before authenticate() logs in (or re-validates) again
+_AUTH_TTL = 600.0
+
+# Magnet URLs extracted from a thread are reused for this many seconds (bounded entry count)
+_THREAD_CACHE_TTL = 300.0
+_THREAD_CACHE_MAXSIZE = 512
+
+# Result rows taken from one search page (same limit as the diagnostic script)
+_MAX_SEARCH_RESULTS = 25
+
+# Concurrent thread page fetches per search (each one is a blocking round-trip to the forum);
+# kept below the login session's connection pool size so no connection is discarded
+_MAGNET_WORKERS = 8
+
+@lru_cache(maxsize=4)
+def _find_config_path(cwd: str) -> str:
+    """
+    Locate mircrew.yml, checking the candidate locations once per working directory.
+
+    Args:
+        cwd: Current working directory (part of the cache key)
+
+    Returns:
+        str: Path to the config file, or the cwd-relative fallback
+    """
+    # Try multiple possible paths
+    possible_paths = [
+        # Relative to current file
+        os.path.join(os.path.dirname(__file__), '..', '..', '..', 'config', 'mircrew.yml'),
+        # Relative to project root
+        os.path.join(cwd, 'config', 'mircrew.yml'),
+        # Absolute path for Docker
+        '/app/config/mircrew.yml',
+    ]
+
+    for path in possible_paths:
+        if os.path.isfile(path):
+            logger.debug(f"Using config file: {path}")
+            return path
+
+    # Fallback: use current working directory
+    fallback_path = os.path.join(cwd, 'config', 'mircrew.yml')
+    logger.warning(f"Config file not found, using fallback: {fallback_path}")
+    return fallback_path
+
+@lru_cache(maxsize=4)
+def _read_config(config_path: str, mtime_ns: Optional[int]) -> Tuple[Mapping[str, str], Mapping[str, str]]:
+    """
+    Load category mappings and default sizes from a mircrew.yml file.
+
+    Cached per file version, so each indexer instance after the first reuses
+    the parsed result until the file changes.
+
+    Args:
+        config_path: Path to mircrew.yml
+        mtime_ns: Modification time of the file (None if it cannot be stat'ed); part of the cache key
+
+    Returns:
+        Tuple of read-only (cat_mappings, default_sizes); the module fallbacks
+        are used for whatever the config does not override
+    """
+    # Default fallback mappings (read-only); config sizes are collected separately and merged on return
+    cat_mappings: Mapping[str, str] = _DEFAULT_CAT_MAPPINGS
+    default_sizes: Mapping[str, str] = _DEFAULT_SIZES
+    size_overrides: Dict[str, str] = {}
+
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = yaml.load(f, Loader=_YAML_LOADER)
+
+        if config and 'caps' in config and 'categorymappings' in config['caps']:
+            loaded_mappings = {}
+
+            # Build mappings from config categories
+            for mapping in config['caps']['categorymappings']:
+                if isinstance(mapping, dict) and 'id' in mapping and 'cat' in mapping:
+                    forum_id = str(mapping['id'])
+                    category = mapping['cat']
+                    loaded_mappings[forum_id] = category
+
+            if loaded_mappings:
+                cat_mappings = loaded_mappings
+                logger.info(f"Loaded {len(loaded_mappings)} category mappings from config")
+
+            # Extract size mappings from config if available
+            if 'fields' in config and 'size_default' in config['fields']:
+                config_sizes = config['fields']['size_default']
+                if 'case' in config_sizes:
+                    # Forum id -> category of its first mapping, for the case rule lookups below
+                    id_to_cat: Dict[str, str] = {}
+                    for mapping in config['caps']['categorymappings']:
+                        if isinstance(mapping, dict) and 'id' in mapping:
+                            id_to_cat.setdefault(str(mapping['id']), mapping.get('cat', ''))
+
+                    for case_rule, size in config_sizes['case'].items():
+                        # Parse forum IDs from case rules like "a[href*=\"f=25\"]"
+                        match = _CASE_RULE_FORUM_RE.search(case_rule)
+                        if match and size:
+                            # Set size for this forum's category
+                            size_str = str(size)
+                            category_name = id_to_cat.get(match.group(1))
+                            if category_name in ('Movies', 'TV', 'Books', 'Audio') and size_str:
+                                size_overrides[category_name] = size_str
+
+    except (FileNotFoundError, yaml.YAMLError, KeyError) as e:
+        logger.warning(f"Failed to load config from {config_path}: {type(e).__name__}")
+        logger.info("Using hardcoded fallback mappings")
+
+    except Exception as e:
+        logger.error(f"Unexpected error loading config: {type(e).__name__}: {str(e)}")
+        logger.info("Using hardcoded fallback mappings")
+
+    # Shared by every indexer using this file, so hand out read-only views
+    if isinstance(cat_mappings, dict):
+        cat_mappings = MappingProxyType(cat_mappings)
+    if size_overrides:
+        default_sizes = MappingProxyType({**_DEFAULT_SIZES, **size_overrides})
+    return cat_mappings, default_sizes
+
 class MirCrewIndexer:
     """
     Torznab-compatible indexer for mircrew-releases.org
     Returns all magnet links from each thread as separate results
     """
 
+    # User agent of the pre-login session (replaced by the login handler's session on success)
+    _USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
     def __init__(self, config_path: Optional[str] = None):
         """
         Initialize indexer with config path.
@@ -48,121 +412,36 @@ class MirCrewIndexer:
         self.base_url = "https://mircrew-releases.org"
         self.session: Optional[Session] = None
         self.logged_in = False
+        # time.monotonic() until which a successful login is reused without re-checking
+        self._auth_expiry = 0.0
         self.login_handler = MirCrewLogin()
         # Initialize magnet unlocker - will share the same session
         self.unlocker: Optional[MagnetUnlocker] = None
 
+        # Magnet URLs per thread URL as (expiry, urls), shared by the extraction workers
+        self._thread_cache: Dict[str, Tuple[float, List[str]]] = {}
+        self._thread_cache_lock = threading.Lock()
+
         # Load configuration
         self.config_path = config_path or self._get_config_path()
         self.cat_mappings, self.default_sizes = self._load_config()
 
     def _get_config_path(self) -> str:
         """Get path to mircrew.yml config file."""
-        # Try multiple possible paths
-        possible_paths = [
-            # Relative to current file
-            os.path.join(os.path.dirname(__file__), '..', '..', '..', 'config', 'mircrew.yml'),
-            # Relative to project root
-            os.path.join(os.getcwd(), 'config', 'mircrew.yml'),
-            # Absolute path for Docker
-            '/app/config/mircrew.yml',
-        ]
-
-        for path in possible_paths:
-            if os.path.isfile(path):
-                logger.debug(f"Using config file: {path}")
-                return path
-
-        # Fallback: use current working directory
-        fallback_path = os.path.join(os.getcwd(), 'config', 'mircrew.yml')
-        logger.warning(f"Config file not found, using fallback: {fallback_path}")
-        return fallback_path
-
-    def _load_config(self) -> tuple[dict[str, str], dict[str, str]]:
+        return _find_config_path(os.getcwd())
+
+    def _load_config(self) -> Tuple[Mapping[str, str], Mapping[str, str]]:
         """
         Load category mappings and default sizes from config file.
 
         Returns:
-            Tuple of (cat_mappings dict, default_sizes dict)
-        """
-        # Default fallback mappings
-        cat_mappings = {
-            '25': 'Movies',
-            '26': 'Movies',
-            '51': 'TV',
-            '52': 'TV',
-            '29': 'TV/Documentary',
-            '30': 'TV',
-            '31': 'TV',
-            '33': 'TV/Anime',
-            '34': 'Movies/Other',
-            '35': 'TV/Anime',
-            '36': 'Movies/Other',
-            '37': 'TV/Anime',
-            '39': 'Books',
-            '40': 'Books/EBook',
-            '41': 'Audio/Audiobook',
-            '42': 'Books/Comics',
-            '43': 'Books/Mags',
-            '45': 'Audio',
-            '46': 'Audio'
-        }
-
-        default_sizes = {
-            'Movies': '10GB',
-            'TV': '2GB',
-            'TV/Documentary': '2GB',
-            'Books': '512MB',
-            'Audio': '512MB'
-        }
-
+            Tuple of read-only (cat_mappings, default_sizes) mappings
+        """
         try:
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
-
-            if config and 'caps' in config and 'categorymappings' in config['caps']:
-                loaded_mappings = {}
-
-                # Build mappings from config categories
-                for mapping in config['caps']['categorymappings']:
-                    if isinstance(mapping, dict) and 'id' in mapping and 'cat' in mapping:
-                        forum_id = str(mapping['id'])
-                        category = mapping['cat']
-                        loaded_mappings[forum_id] = category
-
-                if loaded_mappings:
-                    cat_mappings = loaded_mappings
-                    logger.info(f"Loaded {len(loaded_mappings)} category mappings from config")
-
-                # Extract size mappings from config if available
-                if 'fields' in config and 'size_default' in config['fields']:
-                    config_sizes = config['fields']['size_default']
-                    if 'case' in config_sizes:
-                        for case_rule, size in config_sizes['case'].items():
-                            # Parse forum IDs from case rules like "a[href*=\"f=25\"]"
-                            import re
-                            match = re.search(r'f=(\d+)', case_rule)
-                            if match and size:
-                                forum_id = match.group(1)
-                                # Convert category object to category id mapping
-                                for mapping in config['caps']['categorymappings']:
-                                    if isinstance(mapping, dict) and str(mapping.get('id', '')) == forum_id:
-                                        # Set size for this category
-                                        size_str = str(size)
-                                        category_name = mapping.get('cat', '')
-                                        if category_name in ['Movies', 'TV', 'Books', 'Audio'] and size_str:
-                                            default_sizes[category_name] = size_str
-                                        break
-
-        except (FileNotFoundError, yaml.YAMLError, KeyError) as e:
-            logger.warning(f"Failed to load config from {self.config_path}: {type(e).__name__}")
-            logger.info("Using hardcoded fallback mappings")
-
-        except Exception as e:
-            logger.error(f"Unexpected error loading config: {type(e).__name__}: {str(e)}")
-            logger.info("Using hardcoded fallback mappings")
-
-        return cat_mappings, default_sizes
+            mtime_ns: Optional[int] = os.stat(self.config_path).st_mtime_ns
+        except (OSError, ValueError, TypeError):
+            mtime_ns = None
+        return _read_config(self.config_path, mtime_ns)
 
     def _extract_forum_id_from_url(self, url: str) -> Optional[str]:
         """
@@ -174,36 +453,48 @@ class MirCrewIndexer:
         Returns:
             Forum ID string or None if not found
         """
-        try:
-            parsed_url = urlparse(url)
-            query_params = dict(parse_qs(parsed_url.query))
-            return query_params.get('f', [None])[0]
-        except (ValueError, TypeError):
+        if not isinstance(url, str):
             logger.debug(f"Could not extract forum ID from URL: {url}")
             return None
 
+        match = _FORUM_ID_RE.search(url)
+        return match.group(1) if match else None
+
     def authenticate(self) -> bool:
         """Authenticate using internal MirCrewLogin - EXACT DIAGNOSTIC APPROACH"""
 
+        # A login from the last few minutes is trusted as-is (no round-trip per search)
+        if self.logged_in and self.session is not None and time.monotonic() < self._auth_expiry:
+            logger.debug("♻️ Reusing recent authentication")
+            return True
+
+        # Past the window, a session that still shows a logout link only needs a cheap check, not a new login
+        if self.logged_in and self.session is not None and self.login_handler.is_logged_in():
+            self._auth_expiry = time.monotonic() + _AUTH_TTL
+            logger.debug("♻️ Session still valid - extending authentication")
+            return True
+
         # CRITICAL: Initialize session BEFORE calling login
         self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        })
+        self.session.headers['User-Agent'] = self._USER_AGENT
 
         if self.login_handler.login():
             # REPLACE with login client's session (diagnostic approach)
             self.session = self.login_handler.session
             self.logged_in = True
+            self._auth_expiry = time.monotonic() + _AUTH_TTL
             logger.info("✅ Successfully authenticated")
 
-            # Initialize magnet unlocker with the same session
-            self.unlocker = MagnetUnlocker()
-            self.unlocker.session = self.session  # Share the authenticated session
-            self.unlocker.logged_in = True
+            # Magnets unlocked under a previous login may no longer match what this one sees
+            self.clear_cache()
+
+            # Initialize magnet unlocker with the same session, so thread fetches reuse
+            # the login session's pooled keep-alive connections instead of a fresh Session
+            self.unlocker = MagnetUnlocker(shared_session=self.session)
 
             return True
         else:
+            self.logged_in = False
             logger.error("❌ Authentication failed")
             return False
 
@@ -253,12 +544,11 @@ class MirCrewIndexer:
             if not keywords and year:
                 keywords = str(year)
             elif not keywords:
-                from datetime import datetime
                 keywords = str(datetime.now().year)
 
             # EXACT keyword processing from mircrew.yml
             # 1. Strip season/episode patterns
-            keywords = re.sub(r'\b(?:[SE]\d{1,4}){1,2}\b', '', keywords).strip()
+            keywords = _SEASON_EPISODE_RE.sub('', keywords).strip()
             # 2. Add + prefix to each word if multiple words
             if keywords and ' ' in keywords:
                 words = [word.strip() for word in keywords.split() if word.strip()]
@@ -295,7 +585,7 @@ class MirCrewIndexer:
     
             # Enhanced error handling with better error messages
             try:
-                response = self.session.get(search_url, params=search_params, timeout=30, allow_redirects=True)
+                response = self.session.get(search_url, params=search_params, timeout=30, allow_redirects=True, stream=True)
             except requests.exceptions.Timeout:
                 logger.error("⏱️ Request timed out after 30 seconds")
                 raise ConnectionError("Request timed out - forum may be overloaded")
@@ -304,44 +594,23 @@ class MirCrewIndexer:
                 raise ConnectionError("Unable to connect to MirCrew forum - check network connectivity")
 
             if response.status_code != 200:
+                response.close()
                 return self._error_response(f"Search failed with status {response.status_code}")
 
-            # Parse search results and build thread list
-            threads = self._parse_search_results(response.text, keywords)
-
-            # DEBUG OUTPUT: Compare with diagnostic - full HTML analysis
-            if q == "Matrix":  # Add debug output for testing
-                logger.info(f"🔍 DEBUG: Response status: {response.status_code}")
-                logger.info(f"🔍 DEBUG: Response URL: {response.url}")
-                logger.info(f"🔍 DEBUG: Content-Type: {response.headers.get('content-type', 'unknown')}")
-                logger.info(f"🔍 DEBUG: Content-Length: {len(response.text)}")
-                logger.info(f"🔍 DEBUG: Full response text sample: {response.text[:1000]}...")
-                logger.info(f"🔍 DEBUG: Looking for HTML elements:")
-                if '<html' in response.text.lower():
-                    logger.info("✅ HTML found - normal HTML response")
-                if '<?xml' in response.text:
-                    logger.info("⚠️ XML found - forum returning XML instead of HTML")
-                if '<li class="row"' in response.text:
-                    logger.info("✅ Found search result rows - parsing should work")
-                else:
-                    logger.info("❌ No search result rows found - parsing will fail")
-                soup = BeautifulSoup(response.text, 'html.parser')
-                logger.info(f"🔍 DEBUG: Found {len(soup.find_all('li', class_='row'))} 'li.row' elements")
-                logger.info(f"🔍 DEBUG: Found {len(soup.find_all(['li', 'div'], class_=re.compile(r'row|bg2')))} potential result elements")
-
-            # For each thread, fetch and extract magnets
-            all_magnets = []
-            for thread in threads:
-                # Set category ID based on loaded config
-                if 'forum_id' in thread and str(thread['forum_id']) in self.cat_mappings:
-                    thread['category_id'] = thread['forum_id']
+            # DEBUG OUTPUT: Compare with diagnostic - full HTML analysis (reads the whole page)
+            if q == "Matrix" and logger.isEnabledFor(logging.DEBUG):
+                self._debug_dump_response(response)
 
-                # Apply size defaults based on loaded config
-                if thread.get('category') in self.default_sizes:
-                    thread['size'] = self.default_sizes[thread['category']]
+            # Parse search results and build thread list (streamed; stops reading rows at the result limit)
+            threads = self._parse_search_response(response, keywords)
 
-                thread_magnets = self._extract_thread_magnets(thread)
-                all_magnets.extend(thread_magnets)
+            # Fetch and extract magnets for all threads concurrently (map keeps result order)
+            all_magnets = []
+            if threads:
+                workers = min(_MAGNET_WORKERS, len(threads))
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='mircrew-thread') as executor:
+                    for thread_magnets in executor.map(self._extract_thread_magnets, threads):
+                        all_magnets.extend(thread_magnets)
 
             # Build and return Torznab XML
             return self._build_torznab_xml(all_magnets)
@@ -356,98 +625,153 @@ class MirCrewIndexer:
             logger.error(f"❌ Unexpected search error: {type(e).__name__}: {str(e)}")
             return self._error_response(f"Unexpected error: {type(e).__name__}")
 
+    def _debug_dump_response(self, response: requests.Response) -> None:
+        """
+        Log a diagnostic analysis of a search response (debug aid for the "Matrix" query).
+
+        Only the head of the body is sniffed for the document type and result rows are
+        counted on the raw bytes, so no second parse of the page is needed.
+
+        Args:
+            response: Search page response; its body is read in full
+        """
+        body = response.content
+        head = body[:_DEBUG_SNIFF_BYTES]
+        logger.debug(f"🔍 DEBUG: Response status: {response.status_code}")
+        logger.debug(f"🔍 DEBUG: Response URL: {response.url}")
+        logger.debug(f"🔍 DEBUG: Content-Type: {response.headers.get('content-type', 'unknown')}")
+        logger.debug(f"🔍 DEBUG: Content-Length: {len(body)}")
+        logger.debug(f"🔍 DEBUG: Full response text sample: {head[:1000].decode('utf-8', 'replace')}...")
+        logger.debug(f"🔍 DEBUG: Looking for HTML elements:")
+        if _HTML_TAG_BYTES_RE.search(head):
+            logger.debug("✅ HTML found - normal HTML response")
+        if b'<?xml' in head:
+            logger.debug("⚠️ XML found - forum returning XML instead of HTML")
+        row_count = body.count(b'<li class="row')
+        if row_count:
+            logger.debug("✅ Found search result rows - parsing should work")
+        else:
+            logger.debug("❌ No search result rows found - parsing will fail")
+        logger.debug(f"🔍 DEBUG: Found {row_count} 'li.row' elements")
+
     def _parse_search_results(self, html: str, keywords: str = "") -> List[Dict]:
         """
         Parse search results HTML and extract thread data - USING DIAGNOSTIC APPROACH
         """
-        soup = BeautifulSoup(html, 'html.parser')
-        threads = []
+        return self._parse_result_rows((html,), keywords)
 
-        # EXACTLY copy the diagnostic_fixed.py approach
-        # Just parse titles like the diagnostic does
+    def _parse_search_response(self, response: requests.Response, keywords: str = "") -> List[Dict[str, Any]]:
+        """
+        Parse a (streamed) search response, reading the page only as far as needed.
+
+        Args:
+            response: Search page response, ideally requested with stream=True
+            keywords: Processed search keywords
+
+        Returns:
+            List[Dict]: Thread entries, as from _parse_search_results()
+        """
+        chunks = response.iter_content(chunk_size=_SEARCH_PAGE_CHUNK)
+        threads = self._parse_result_rows(chunks, keywords)
+
+        # Drain the remainder unparsed so the connection stays reusable
+        for _ in chunks:
+            pass
+        return threads
 
-        # Step 1: EXACT SAME element finding as diagnostic_fixed.py
-        elements = soup.find_all(['li', 'div'], class_=re.compile(r'row|bg2'))
+    def _parse_result_rows(self, chunks: Iterable[Union[str, bytes]], keywords: str = "") -> List[Dict[str, Any]]:
+        """
+        Build thread entries from the result rows of a search page.
 
-        logger.info(f"🔍 Parser found {len(elements)} raw elements")
+        Args:
+            chunks: The search page as successive text or byte chunks
+            keywords: Processed search keywords
 
-        # Step 2: EXACT SAME processing as diagnostic_fixed.py
-        results = []
+        Returns:
+            List[Dict]: At most _MAX_SEARCH_RESULTS thread entries, in page order
+        """
+        threads = []
         processed_count = 0
-        valid_count = 0
 
-        for element in elements:
-            processed_count += 1
+        # Loop-invariant lookups bound once
+        cat_mappings = self.cat_mappings
+        default_sizes = self.default_sizes
+        absolute_url = self._absolute_url
+        extract_forum_id = self._extract_forum_id_from_url
+        # All rows of one page share a single publication timestamp
+        now_iso = datetime.now().isoformat()
+
+        # EXACTLY copy the diagnostic_fixed.py approach
+        # Just parse titles like the diagnostic does, one row at a time as the page streams in
+        for processed_count, element in enumerate(_iter_result_rows(chunks), 1):
             logger.debug(f"🔍 Processing element {processed_count}...")
 
             # Find topic title link - EXACT diagnostic approach
-            link = element.find('a', class_='topictitle')
+            title_links = _TOPIC_TITLE_XPATH(element)
+            title_link = title_links[0] if title_links else None
 
-            if not link or not link.get('href'):
+            if title_link is None or not title_link.get('href'):
                 logger.debug(f"❌ Element {processed_count}: No title link")
                 continue
 
             # Get full text like diagnostic does
-            full_text = element.get_text().strip()
+            full_text = _ELEMENT_TEXT_XPATH(element).strip()
             if not full_text or len(full_text) < 10:
                 logger.debug(f"❌ Element {processed_count}: Full text too short ({len(full_text)} chars)")
                 continue
 
-            # Success! This element has valid content
-            valid_count += 1
             logger.debug(f"✅ Element {processed_count}: Valid content found")
 
-            # Like diagnostic: add to results array
-            results.append(full_text[:150])
-
-            # Match diagnostic's limit
-            if len(results) >= 25:
-                break
-
-        logger.info(f"📝 Parser found {len(results)} valid threads from {len(elements)} raw elements")
-
-        # Convert results to expected thread format, now with proper URLs
-        threads = []
-        processed_results = 0
-
-        for element in elements:
-            # Reprocess elements to get URL from the title link
-            title_link = element.find('a', class_='topictitle')
-            if not title_link or not title_link.get('href'):
-                continue
-
-            full_text = element.get_text().strip()
-            if not full_text or len(full_text) < 10:
-                continue
-
             # Extract the REAL URL from the title link (critical fix!)
-            details_url = urljoin(self.base_url, title_link['href'])
+            details_url = absolute_url(title_link.get('href'))
 
-            # Extract forum ID from URL to determine category
-            forum_id = self._extract_forum_id_from_url(details_url)
-            category = self.cat_mappings.get(str(forum_id), 'TV')
-            category_id = str(forum_id) if forum_id else '52'
+            # Extract forum ID from URL to determine category (already a string, or None);
+            # category, category ID and size default are all resolved here, once per row
+            forum_id = extract_forum_id(details_url)
+            category = cat_mappings.get(forum_id, 'TV') if forum_id else 'TV'
+            category_id = forum_id or '52'
 
             # Apply size defaults from config
-            default_size = self.default_sizes.get(category, '1GB')
+            default_size = default_sizes.get(category, '1GB')
 
             threads.append({
-                'title': title_link.get_text().strip()[:100],
+                'title': _ELEMENT_TEXT_XPATH(title_link).strip()[:100],
                 'details': details_url,  # REAL URL for magnet extraction!
                 'category': category,
                 'category_id': category_id,
-                'pub_date': datetime.now().isoformat(),
+                'pub_date': now_iso,
                 'size': default_size,  # Use config-based size defaults
                 'forum_id': forum_id,
                 'full_text': full_text
             })
 
-            processed_results += 1
-            if processed_results >= len(results):  # Limit to the analyzed results
+            # Match diagnostic's limit
+            if len(threads) >= _MAX_SEARCH_RESULTS:
                 break
 
+        logger.info(f"📝 Parser found {len(threads)} valid threads from {processed_count} raw elements")
+
         return threads
 
+    def _absolute_url(self, href: str) -> str:
+        """
+        Resolve a forum link against base_url.
+
+        phpBB writes its links as './viewtopic.php?...' or '/viewtopic.php?...',
+        which resolve by plain concatenation; anything else goes through urljoin.
+
+        Args:
+            href: Link as found in the page
+
+        Returns:
+            str: Absolute URL
+        """
+        if href.startswith('./') and not href.startswith(('./.', './/')):
+            return f"{self.base_url}/{href[2:]}"
+        if href.startswith('/') and not href.startswith('//'):
+            return f"{self.base_url}{href}"
+        return urljoin(self.base_url, href)
+
     def _search_thread_by_id(self, query: str) -> str:
         """
         Search for specific thread by ID using syntax: thread::{Thread_Number}
@@ -488,57 +812,14 @@ class MirCrewIndexer:
             all_magnets = self._extract_thread_magnets(thread_data)
 
             # Build and return Torznab XML for direct thread search
-            xml_lines = [
-                '<?xml version="1.0" encoding="UTF-8"?>',
-                '<rss version="2.0" xmlns:torznab="http://torznab.com/schemas/2015/feed">',
-                '<channel>',
-
-                # No header item for direct thread search - just proceed with magnets
-            ]
-
+            # (no header item for direct thread search - just proceed with magnets)
+            out = StringIO()
+            out.write(_TORZNAB_HEADER)
             for i, magnet in enumerate(all_magnets):
-                guid = f"thread-{thread_id}-{i}"
+                self._write_torznab_item(out, magnet, f"thread-{thread_id}-{i}")
+            out.write(_TORZNAB_FOOTER)
 
-                # Calculate size in bytes for enclosure
-                size_bytes = self._convert_size_to_bytes(magnet["size"])
-    
-                # Extract magnet hash and create HTTP download URL
-                magnet_hash = self._extract_magnet_hash(magnet["link"])
-                download_url = f"http://mircrew-indexer:9118/download/{magnet_hash}"
-    
-                # Properly escape all XML content
-                title_escaped = self._escape_xml(magnet["title"])
-                link_escaped = self._escape_xml(magnet["link"])
-                details_escaped = self._escape_xml(magnet["details"])
-                category_escaped = self._escape_xml(magnet["category"])
-                description_escaped = self._escape_xml(magnet.get("description", ""))
-    
-                xml_lines.extend([
-                    f'<item>',
-                    f'<title>{title_escaped}</title>',
-                    f'<guid>{guid}</guid>',
-                    f'<link>{link_escaped}</link>',
-                    f'<enclosure url="{download_url}" type="application/x-bittorrent" length="{size_bytes}"/>',
-                    f'<comments>{details_escaped}</comments>',
-                    f'<pubDate>{magnet["pub_date"]}</pubDate>',
-                    f'<category>{category_escaped}</category>',
-                    f'<size>{size_bytes}</size>',
-                    f'<description>{description_escaped}</description>',
-    
-                    # Torznab-specific attributes
-                    f'<torznab:attr name="category" value="{magnet["category_id"]}"/>',
-                    f'<torznab:attr name="size" value="{size_bytes}"/>',
-                    f'<torznab:attr name="seeders" value="1"/>',
-                    f'<torznab:attr name="peers" value="2"/>',
-                    f'<torznab:attr name="downloadvolumefactor" value="0"/>',
-                    f'<torznab:attr name="uploadvolumefactor" value="1"/>',
-    
-                    f'</item>'
-                ])
-
-            xml_lines.extend(['</channel>', '</rss>'])
-
-            xml_output = '\n'.join(xml_lines)
+            xml_output = out.getvalue()
             logger.info(f"📊 Direct thread search complete: {len(all_magnets)} magnets from thread {thread_id}")
             return xml_output
 
@@ -552,31 +833,28 @@ class MirCrewIndexer:
             logger.error(f"❌ Unexpected error in direct thread search: {type(e).__name__}: {str(e)}")
             return self._error_response(f"Unexpected error searching thread: {type(e).__name__}")
 
-    def _contains_partial_match(self, query_term: str, title_text: str) -> bool:
-        """EXACT SAME enhanced matching as diagnostic_fixed.py"""
-        # Direct substring match (handles "Matrix" in "Animatrix")
-        if query_term in title_text:
-            return True
-
-        # Handle cases like "Dexter:" in "Dexter: Resurrection" (phrase prefix)
-        for word in title_text.split():
-            # Check if query term is at start of word
-            if word.lower().startswith(query_term) or query_term.startswith(word.lower()):
-                return True
+    def _contains_partial_match(self, query_term: str, title_text: str,
+                                title_words: Optional[AbstractSet[str]] = None) -> bool:
+        """
+        EXACT SAME enhanced matching as diagnostic_fixed.py
 
-            # Handle hyphenated words
-            if '-' in word:
-                parts = word.split('-')
-                if any(part.lower() == query_term or part.lower().startswith(query_term) for part in parts):
-                    return True
+        Args:
+            query_term: Lowercase search term
+            title_text: Lowercase title to match against
+            title_words: Lowercased words of title_text, when the caller matches several terms against one title
 
-            # Handle words with colons (NEW from diagnostic_fixed.py)
-            if ':' in word:
-                parts = word.split(':')
-                if any(part.lower().strip() == query_term or part.lower().strip().startswith(query_term) for part in parts):
-                    return True
+        Returns:
+            bool: True if the term matches the title
+        """
+        # Direct substring match (handles "Matrix" in "Animatrix"). This also covers the
+        # diagnostic's word-prefix and hyphen/colon part checks ("Dexter:" in "Dexter: Resurrection")
+        if query_term in title_text:
+            return True
 
-        return False
+        # The only other match: a title word that is a prefix of the query term
+        if title_words is None:
+            title_words = {word.lower() for word in title_text.split()}
+        return any(query_term[:end] in title_words for end in range(1, len(query_term) + 1))
 
     def _filter_relevant_results(self, threads: List[Dict], original_query: str) -> List[Dict]:
         """Filter threads using EXACT SAME logic as diagnostic_fixed.py"""
@@ -591,8 +869,10 @@ class MirCrewIndexer:
 
         for thread in threads:
             result_lower = thread['title'].lower()
+            # Tokenize each title once for all of the query's terms
+            title_words = set(result_lower.split())
             # SAME logic as diagnostic_fixed.py line 126
-            if all(self._contains_partial_match(term, result_lower) for term in search_terms):
+            if all(self._contains_partial_match(term, result_lower, title_words) for term in search_terms):
                 relevant.append(thread)
             else:
                 not_relevant.append(thread)
@@ -618,12 +898,25 @@ class MirCrewIndexer:
 
             logger.info(f"🔓 Attempting to unlock magnets for thread: {thread_url}")
 
-            # Use the unlocker to get magnets (this will handle thanks button clicking)
-            magnet_urls = self.unlocker.extract_magnets_with_unlock(thread_url)
+            magnet_urls = self._cached_magnet_urls(thread_url)
+            if magnet_urls is None:
+                # Use the unlocker to get magnets (this will handle thanks button clicking)
+                magnet_urls = self.unlocker.extract_magnets_with_unlock(thread_url)
 
-            if not isinstance(magnet_urls, list):
-                logger.error(f"❌ Invalid magnet URLs returned from unlocker: {type(magnet_urls)}")
-                return magnets
+                if not isinstance(magnet_urls, list):
+                    logger.error(f"❌ Invalid magnet URLs returned from unlocker: {type(magnet_urls)}")
+                    return magnets
+
+                self._cache_magnet_urls(thread_url, magnet_urls)
+
+            # Fields every magnet of this thread shares, built once and copied per magnet
+            # (the thread's size is converted once here too)
+            magnet_base = {
+                **thread,
+                'seeders': 1,  # Default (not available in HTML)
+                'peers': 2,    # Default (not available in HTML)
+                'size_bytes': self._convert_size_to_bytes(thread.get('size', '')),
+            }
 
             for magnet_url in magnet_urls:
                 # Validation check for magnet URL
@@ -631,8 +924,8 @@ class MirCrewIndexer:
                     logger.debug(f"⚠️ Skipping invalid magnet URL: {magnet_url[:50]}...")
                     continue
 
-                # 🆕 EXTRACT MAGNET TITLE FROM dn PARAMETER
-                display_name = self._extract_display_name(magnet_url)
+                # 🆕 EXTRACT MAGNET TITLE FROM dn PARAMETER (hash is kept for the XML download URL)
+                magnet_hash, display_name = self._parse_magnet(magnet_url)
 
                 if display_name:
                     # Use display name directly as magnet title (filename with episode info)
@@ -643,15 +936,13 @@ class MirCrewIndexer:
                     magnet_title = thread['title']  # Default fallback to thread title
                     magnet_description = f"Magnet link from thread: {thread['title']}"
 
-                magnets.append({
-                    **thread,
-                    'title': magnet_title,  # 🆕 Use magnet-specific title instead of thread title
-                    'download': magnet_url,
-                    'link': magnet_url,
-                    'description': magnet_description,
-                    'seeders': 1,  # Default (not available in HTML)
-                    'peers': 2,    # Default (not available in HTML)
-                })
+                magnet = magnet_base.copy()
+                magnet['title'] = magnet_title  # 🆕 Use magnet-specific title instead of thread title
+                magnet['download'] = magnet_url
+                magnet['link'] = magnet_url
+                magnet['description'] = magnet_description
+                magnet['_hash'] = magnet_hash
+                magnets.append(magnet)
 
                 logger.debug(f"🔗 Extracted magnet title: '{magnet_title}'")
                 logger.debug(f"🔗 Magnet: {magnet_url[:50]}...")
@@ -664,6 +955,54 @@ class MirCrewIndexer:
         logger.info(f"🧲 Found {len(magnets)} magnet(s) in thread: {thread['title'][:50]}...")
         return magnets
 
+    def clear_cache(self) -> None:
+        """
+        Forget all magnet URLs cached per thread, forcing the next lookups to refetch.
+        """
+        with self._thread_cache_lock:
+            self._thread_cache.clear()
+
+    def _cached_magnet_urls(self, thread_url: str) -> Optional[List[str]]:
+        """
+        Look up the magnet URLs recently extracted from a thread.
+
+        Args:
+            thread_url: Thread page URL
+
+        Returns:
+            Optional[List[str]]: Cached magnet URLs, or None if missing or expired
+        """
+        with self._thread_cache_lock:
+            entry = self._thread_cache.get(thread_url)
+            if entry is None:
+                return None
+            expiry, magnet_urls = entry
+            if expiry <= time.monotonic():
+                del self._thread_cache[thread_url]
+                return None
+
+        logger.info(f"♻️ Using {len(magnet_urls)} cached magnet(s) for thread: {thread_url}")
+        return list(magnet_urls)
+
+    def _cache_magnet_urls(self, thread_url: str, magnet_urls: List[str]) -> None:
+        """
+        Remember the magnet URLs extracted from a thread for _THREAD_CACHE_TTL seconds.
+
+        Empty results are not cached, since they are usually a failed fetch or unlock.
+
+        Args:
+            thread_url: Thread page URL
+            magnet_urls: Magnet URLs returned by the unlocker
+        """
+        if not magnet_urls:
+            return
+
+        with self._thread_cache_lock:
+            if thread_url not in self._thread_cache and len(self._thread_cache) >= _THREAD_CACHE_MAXSIZE:
+                # Evict the oldest entry (dicts keep insertion order)
+                del self._thread_cache[next(iter(self._thread_cache))]
+            self._thread_cache[thread_url] = (time.monotonic() + _THREAD_CACHE_TTL, list(magnet_urls))
+
     def _parse_size(self, title: str) -> Optional[str]:
         """
         Parse size information from thread title with enhanced patterns.
@@ -677,156 +1016,126 @@ class MirCrewIndexer:
         if not title:
             return None
 
-        # Patterns ordered by specificity (most specific first)
-        patterns = [
-            # Standard format: 1.5GB, 500MB, etc.
-            r'\b(\d+(?:[\.,]\d{1,2})?)\s*(GB|MB|TB|KiB|MiB|GiB|B)\b',
-            # With parentheses: (1.5GB), [500MB]
-            r'[\(\[\{](\d+(?:[\.,]\d{1,2})?)\s*(GB|MB|TB|KiB|MiB|GiB|B)[\)\]\}]',
-            # Italian format: 1,5 GB, 500 MB
-            r'\b(\d+[\.,]\d{1,2})\s*(GB|MB|TB|KiB|MiB|GiB|B)\b',
-            # Simple bytes: 1024MB
-            r'(\d+(?:[\.,]\d{1,2})?)(GB|MB|TB|KiB|MiB|GiB|B)',
-        ]
-
-        for pattern in patterns:
-            matches = re.findall(pattern, title, re.IGNORECASE)
-            if matches:
-                # Take the first match and normalize
-                size_num, size_unit = matches[0]
-                size_unit = size_unit.upper()
+        match = _TITLE_SIZE_RE.search(title) or _TITLE_SIZE_LOOSE_RE.search(title)
+        if not match:
+            return None
 
-                # Normalize Italian decimal separator
-                size_num = size_num.replace(',', '.')
+        size_num, size_unit = match.groups()
+        size_unit = size_unit.upper()
 
-                # Handle 'B' suffix (assume MB if no unit)
-                if size_unit == 'B':
-                    size_unit = 'MB'
+        # Normalize Italian decimal separator
+        size_num = size_num.replace(',', '.')
 
-                return f"{size_num}{size_unit}"
+        # Handle 'B' suffix (assume MB if no unit)
+        if size_unit == 'B':
+            size_unit = 'MB'
 
-        return None
+        return f"{size_num}{size_unit}"
 
     def _build_torznab_xml(self, magnets: List[Dict]) -> str:
         """
         Build Torznab XML response
         """
-        xml_lines = [
-            '<?xml version="1.0" encoding="UTF-8"?>',
-            '<rss version="2.0" xmlns:torznab="http://torznab.com/schemas/2015/feed">',
-            '<channel>',
-        ]
-
+        out = StringIO()
+        out.write(_TORZNAB_HEADER)
         for i, magnet in enumerate(magnets):
-            guid = f"magnet-{magnet['details'].split('=')[-1]}-{i}"
-
-            # Calculate size in bytes for enclosure
-            size_bytes = self._convert_size_to_bytes(magnet["size"])
-
-            # Extract magnet hash and create HTTP download URL
-            magnet_hash = self._extract_magnet_hash(magnet["link"])
-            download_url = f"http://mircrew-indexer:9118/download/{magnet_hash}"
+            self._write_torznab_item(out, magnet, f"magnet-{magnet['details'].split('=')[-1]}-{i}")
+        out.write(_TORZNAB_FOOTER)
 
-            # Properly escape all XML content in direct thread search
-            title_escaped = self._escape_xml(magnet["title"])
-            link_escaped = self._escape_xml(magnet["link"])
-            details_escaped = self._escape_xml(magnet["details"])
-            category_escaped = self._escape_xml(magnet["category"])
-            description_escaped = self._escape_xml(magnet.get("description", ""))
+        return out.getvalue()
 
-            xml_lines.extend([
-                f'<item>',
-                f'<title>{title_escaped}</title>',
-                f'<guid>{guid}</guid>',
-                f'<link>{link_escaped}</link>',
-                f'<enclosure url="{download_url}" type="application/x-bittorrent" length="{size_bytes}"/>',
-                f'<comments>{details_escaped}</comments>',
-                f'<pubDate>{magnet["pub_date"]}</pubDate>',
-                f'<category>{category_escaped}</category>',
-                f'<size>{size_bytes}</size>',
-                f'<description>{description_escaped}</description>',
-
-                # Torznab-specific attributes
-                f'<torznab:attr name="category" value="{magnet["category_id"]}"/>',
-                f'<torznab:attr name="size" value="{size_bytes}"/>',
-                f'<torznab:attr name="seeders" value="1"/>',
-                f'<torznab:attr name="peers" value="2"/>',
-                f'<torznab:attr name="downloadvolumefactor" value="0"/>',
-                f'<torznab:attr name="uploadvolumefactor" value="1"/>',
-
-                f'</item>'
-            ])
-
-        xml_lines.extend(['</channel>', '</rss>'])
-
-        return '\n'.join(xml_lines)
-
-    def _extract_display_name(self, magnet_url: str) -> Optional[str]:
+    def _write_torznab_item(self, out: StringIO, magnet: Dict[str, Any], guid: str) -> None:
         """
-        Extract the display name (filename) from the magnet link's dn parameter
+        Write one magnet as a Torznab <item> element.
+
+        Args:
+            out: Buffer the XML document is being written to
+            magnet: Magnet entry built by _extract_thread_magnets()
+            guid: Unique item identifier
         """
-        try:
-            if not isinstance(magnet_url, str) or not magnet_url:
-                return None
+        # Size in bytes for enclosure (precomputed per thread at extraction time)
+        size_bytes = magnet.get('size_bytes') or self._convert_size_to_bytes(magnet["size"])
 
-            # Parse the URL to get query parameters
-            parsed_url = urlparse(magnet_url)
-            if parsed_url.scheme != 'magnet':
-                logger.debug(f"⚠️ Not a magnet URL: {magnet_url[:50]}...")
-                return None
+        # Magnet hash (parsed once at extraction time) for the HTTP download URL
+        if '_hash' in magnet:
+            magnet_hash = magnet['_hash']
+        else:
+            magnet_hash, _ = self._parse_magnet(magnet["link"])
+        download_url = f"http://mircrew-indexer:9118/download/{magnet_hash}"
+
+        # Properly escape all XML content (every value that comes from the forum or config)
+        escape = self._escape_xml
+        out.write(_TORZNAB_ITEM_TEMPLATE % {
+            'title': escape(magnet["title"]),
+            'guid': escape(guid),
+            'link': escape(magnet["link"]),
+            'download_url': download_url,
+            'size_bytes': size_bytes,
+            'comments': escape(magnet["details"]),
+            'pub_date': escape(str(magnet["pub_date"])),
+            'category': escape(magnet["category"]),
+            'description': escape(magnet.get("description", "")),
+            'category_id': escape(str(magnet["category_id"])),
+        })
 
-            query_params = parse_qs(parsed_url.query)
+    def _parse_magnet(self, magnet_url: str) -> Tuple[str, Optional[str]]:
+        """
+        Parse a magnet URL once for both its btih hash and its display name.
 
-            # Look for the dn (display name) parameter
-            if 'dn' in query_params:
-                display_name = query_params['dn'][0]  # Take first value
-                if isinstance(display_name, str) and display_name.strip():
-                    return display_name.strip()
+        Args:
+            magnet_url: Magnet link (magnet:?xt=urn:btih:...&dn=...)
 
-            return None
-        except (ValueError, TypeError) as e:
-            logger.debug(f"⚠️ Error parsing display name from magnet URL: {type(e).__name__}")
-            return None
+        Returns:
+            Tuple[str, Optional[str]]: 40-character btih hash ('' if missing or invalid)
+            and the dn parameter (None if missing or empty)
+        """
+        if not isinstance(magnet_url, str) or not magnet_url:
+            logger.warning("⚠️ Invalid magnet URL provided for hash extraction")
+            return '', None
+
+        if not magnet_url.startswith('magnet:'):
+            logger.warning(f"⚠️ Not a magnet URL: {magnet_url[:50]}...")
+            return '', None
+
+        # Single scan of the query string for the two parameters we need; like parse_qs,
+        # the first non-empty occurrence wins and values are form-decoded ('+' is a space)
+        dn_param = xt_param = None
+        query = magnet_url.partition('?')[2].partition('#')[0]
+        for pair in query.split('&'):
+            key, _, value = pair.partition('=')
+            if not value:
+                continue
+            if key == 'dn' and dn_param is None:
+                dn_param = unquote_plus(value)
+            elif key == 'xt' and xt_param is None:
+                xt_param = unquote_plus(value)
+            if dn_param is not None and xt_param is not None:
+                break
 
-    def _extract_magnet_hash(self, magnet_url: str) -> str:
-        """Extract 40-character btih hash from magnet URL"""
-        try:
-            if not isinstance(magnet_url, str) or not magnet_url:
-                logger.warning("⚠️ Invalid magnet URL provided for hash extraction")
-                return ""
-
-            if not magnet_url.startswith('magnet:'):
-                logger.warning(f"⚠️ Not a magnet URL: {magnet_url[:50]}...")
-                return ""
-
-            import urllib.parse
-            parsed = urllib.parse.urlparse(magnet_url)
-            query_params = urllib.parse.parse_qs(parsed.query)
-
-            if 'xt' in query_params:
-                xt_param = query_params['xt'][0]
-                if isinstance(xt_param, str) and xt_param.startswith('urn:btih:'):
-                    btih_hash = xt_param.split(':')[2][:40]
-                    if len(btih_hash) == 40 and btih_hash.isalnum():
-                        return btih_hash
-                    else:
-                        logger.warning(f"⚠️ Invalid btih hash format: {btih_hash}")
+        # Look for the dn (display name) parameter
+        display_name = None
+        if dn_param and dn_param.strip():
+            display_name = dn_param.strip()
+
+        btih_hash = ''
+        if xt_param:
+            if xt_param.startswith('urn:btih:'):
+                candidate = xt_param.split(':')[2][:40]
+                if len(candidate) == 40 and candidate.isalnum():
+                    btih_hash = candidate
+                else:
+                    logger.warning(f"⚠️ Invalid btih hash format: {candidate}")
 
+        if not btih_hash:
             logger.warning(f"⚠️ No valid btih parameter found in: {magnet_url[:100]}...")
-            return ""
-        except (ValueError, TypeError) as e:
-            logger.warning(f"⚠️ Error extracting magnet hash: {type(e).__name__}: {str(e)}")
-            return ""
+
+        return btih_hash, display_name
 
     def _escape_xml(self, text: str) -> str:
-        """Basic XML escaping"""
+        """Basic XML escaping, safe for both element text and attribute values"""
         if not text:
             return ""
-        # XML entity replacements in correct order
-        replacements = [('&', '&amp;'), ('<', '&lt;'), ('>', '&gt;'), ('"', '&quot;'), ("'", '&apos;')]
-        for old, new in replacements:
-            text = text.replace(old, new)
-        return text
+        return xml_escape(text, _XML_QUOTE_ENTITIES)
 
     def _convert_size_to_bytes(self, size_str: str) -> int:
         """
@@ -841,75 +1150,12 @@ class MirCrewIndexer:
         if not size_str or not isinstance(size_str, str):
             return 1073741824  # Default to 1GB
 
-        # Clean the string and extract components
-        size_str = size_str.upper().strip()
-
-        # Handle Italian decimal separator
-        size_str = size_str.replace(',', '.')
-
-        # Comprehensive unit mapping with both decimal (1000^x) and binary (1024^x) variants
-        multipliers = {
-            # Binary units ( power of 2 )
-            'KIB': 1024,
-            'MIB': 1024**2,
-            'GIB': 1024**3,
-            'TIB': 1024**4,
-
-            # Decimal units ( power of 10 )
-            'KB': 10**3,
-            'MB': 10**6,
-            'GB': 10**9,
-            'TB': 10**12,
-
-            # Legacy units (assuming decimal)
-            'K': 10**3,
-            'M': 10**6,
-            'G': 10**9,
-            'T': 10**12,
-
-            # Special cases
-            'B': 1,       # Just bytes
-        }
-
-        # Match number and unit
-        match = re.match(r'^(\d+(?:\.\d+)?)([KMGT]I?B?)?$', size_str)
-
-        if match:
-            value_str, unit = match.groups()
-            value = float(value_str)
-
-            if unit and unit in multipliers.keys():
-                multiplier = multipliers[unit]
-            elif unit:
-                # Unknown unit, assume it's bytes if just a number
-                logger.debug(f"Unknown unit '{unit}', treating as bytes")
-                multiplier = 1
-            else:
-                # No unit specified, assume GB for large numbers, MB for smaller
-                multiplier = (10**9 if value < 1000 else 10**6)
-
-            try:
-                result = int(value * multiplier)
-                return max(result, 1)  # Ensure at least 1 byte
-            except (OverflowError, ValueError):
-                logger.warning(f"Size conversion overflow for '{size_str}', using default 1GB")
-                return 1073741824
-
-        # We couldn't parse the size, try to extract a number and assume GB
-        try:
-            # Look for any number in the string
-            number_match = re.search(r'(\d+(?:\.\d+)?)', size_str)
-            if number_match:
-                value = float(number_match.group(1))
-                # Assume GB for large numbers, MB for smaller
-                multiplier = 10**9 if value < 100 else 10**6
-                return int(value * multiplier)
-        except (ValueError, OverflowError):
-            pass
+        # Config default sizes are already normalised, so check them before any string work
+        size_bytes = _SIZE_FAST.get(size_str)
+        if size_bytes is not None:
+            return size_bytes
 
-        # Final fallback
-        logger.warning(f"Could not parse size string '{size_str}', using default 1GB")
-        return 1073741824
+        return _size_to_bytes(size_str)
 
     def _error_response(self, message: str) -> str:
         """Return error XML response"""
@@ -8,7 +8,7 @@ import sys
 import os
 import re
 import time
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Match, Pattern, Sequence, Tuple
 
 # Set up centralized logging
 from ..utils.logging_utils import setup_logging, get_logger
@@ -19,15 +19,115 @@ logger = get_logger(__name__)
 from bs4 import Tag
 import requests
 from bs4 import BeautifulSoup
+from lxml import etree
 from urllib.parse import urljoin, urlparse, parse_qs
 
 # Add current directory to path for login import
 sys.path.insert(0, os.path.dirname(__file__))
 
-from .auth import MirCrewLogin
+from .auth import MirCrewLogin, _parse_html
 
 # Logging is now configured centrally in setup_logging() above
 
+# BeautifulSoup tree builder: the C-based lxml one (lxml is a hard dependency)
+_SOUP_PARSER = 'lxml'
+
+# Thanks buttons and post anchors (compiled once; BeautifulSoup matches them with search())
+_THANKS_BUTTON_ID_RE = re.compile(r'lnk_thanks_post\d+')
+_THANKS_ID_RE = re.compile(r'thanks.*\d+')
+_POST_ANCHOR_ID_RE = re.compile(r'post_\d+')
+_POST_DIV_ID_RE = re.compile(r'^post_\d+')
+_POST_ID_HREF_RE = re.compile(r'post_id=(\d+)')
+_DIGITS_RE = re.compile(r'(\d+)')
+
+# Elements with "thank" (any case) in their ID or href, for diagnose_thanks_buttons()
+_THANKS_ELEMENTS_XPATH = etree.XPath(
+    "//*[contains(translate(@id, 'THANK', 'thank'), 'thank')"
+    " or contains(translate(@href, 'THANK', 'thank'), 'thank')]"
+)
+
+# Thread and forum IDs in a viewtopic.php URL
+_THREAD_ID_RE = re.compile(r'viewtopic\.php\?(?:.*&)?t=(\d+)')
+_FORUM_ID_RE = re.compile(r'viewtopic\.php\?(?:.*&)?f=(\d+)')
+
+# Post container classes of common phpBB themes
+_POSTBODY_CLASS_RE = re.compile(r'postbody')
+_POST_TEXT_CLASS_RE = re.compile(r'post-text')
+_CONTENT_CLASS_RE = re.compile(r'content')
+_POST_CLASS_RE = re.compile(r'post')
+_POST_OR_CONTENT_CLASS_RE = re.compile(r'(post|content)')
+
+# Magnet links with a full 40-character btih hash
+_MAGNET_RE = re.compile(r'magnet:\?xt=urn:btih:[a-zA-Z0-9]{40}.*$')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+def _make_soup(response: requests.Response) -> BeautifulSoup:
+    """
+    Parse a thread page response into a BeautifulSoup tree.
+
+    The raw bytes are handed to the parser, which detects the encoding from the page itself,
+    so the body is not decoded to text first.
+
+    Args:
+        response: Thread page response
+
+    Returns:
+        BeautifulSoup: Parsed page
+    """
+    return BeautifulSoup(response.content, _SOUP_PARSER)
+
+def _post_container_rank(tag: Tag) -> Optional[int]:
+    """
+    Rank an element as a phpBB post container, most specific kind first.
+
+    Args:
+        tag: Page element
+
+    Returns:
+        Optional[int]: 0 (postbody div) to 6 (post/content list item), or None if it is no container
+    """
+    classes = tag.get('class') or ()
+    class_list: Sequence[str] = classes.split() if isinstance(classes, str) else classes
+
+    def has_class(pattern: Pattern[str]) -> bool:
+        return any(pattern.search(cls) for cls in class_list)
+
+    if tag.name == 'div':
+        if has_class(_POSTBODY_CLASS_RE):
+            return 0
+        if has_class(_POST_TEXT_CLASS_RE):
+            return 1
+        if has_class(_CONTENT_CLASS_RE):
+            return 2
+        if has_class(_POST_CLASS_RE):
+            return 3
+        if tag.has_attr('data-post-id'):
+            return 5
+        return None
+    if tag.name == 'article':
+        return 4 if has_class(_POST_CLASS_RE) else None
+    if tag.name == 'li':
+        return 6 if has_class(_POST_OR_CONTENT_CLASS_RE) else None
+    return None
+
+def _collect_magnets(container: Tag) -> List[str]:
+    """
+    Collect the magnet links inside an element, in page order and without duplicates.
+
+    Args:
+        container: Element to search (a post container or the whole page)
+
+    Returns:
+        List[str]: Magnet URLs with whitespace and fragments removed
+    """
+    hrefs = (str(link['href']) for link in container.find_all('a', href=_MAGNET_RE))
+    cleaned = (_WHITESPACE_RE.sub('', href).split('#', 1)[0] for href in hrefs)
+    # dict.fromkeys drops repeats in O(1) each while keeping the first occurrence's position
+    magnets = list(dict.fromkeys(url for url in cleaned if _MAGNET_RE.match(url)))
+    for magnet_url in magnets:
+        logger.debug(f"🧲 Found magnet: {magnet_url[:50]}...")
+    return magnets
+
 class MagnetUnlocker:
     """
     Unlocks hidden magnet links by clicking the "Thanks" button with enhanced fallback mechanisms
@@ -140,54 +240,61 @@ class MagnetUnlocker:
     def _extract_first_post_id(self, soup: BeautifulSoup) -> Optional[str]:
         """
         Extract the ID of the first post in the thread by finding thanks buttons
+
+        All lookups share one walk over the page, which stops as soon as the first thanks
+        button is seen. In priority order: the first thanks button, any element with a
+        thanks ID, post anchors, post divs, and finally permalinks.
         """
         try:
-            # NEW APPROACH: Find the FIRST thanks button and extract post ID from it
+            thanks_button_id = thanks_id = anchor_id = div_id = None
+            thanks_digits: Optional[Match[str]] = None
+            permalink_match: Optional[Match[str]] = None
+            for elem in soup.descendants:
+                if not isinstance(elem, Tag):
+                    continue
+                elem_id = elem.get('id')
+                if isinstance(elem_id, str):
+                    if thanks_button_id is None and _THANKS_BUTTON_ID_RE.search(elem_id):
+                        thanks_button_id = elem_id
+                        if elem_id.startswith('lnk_thanks_post'):
+                            break
+                    if thanks_id is None and _THANKS_ID_RE.search(elem_id):
+                        thanks_id = elem_id
+                        thanks_digits = _DIGITS_RE.search(elem_id)
+                    if elem.name == 'a' and anchor_id is None and _POST_ANCHOR_ID_RE.search(elem_id):
+                        anchor_id = elem_id
+                    if elem.name == 'div' and div_id is None and _POST_DIV_ID_RE.search(elem_id):
+                        div_id = elem_id
+                if elem.name == 'a' and permalink_match is None:
+                    href = elem.get('href')
+                    if isinstance(href, str):
+                        permalink_match = _POST_ID_HREF_RE.search(href)
+
+            # NEW APPROACH: Take the FIRST thanks button's ID and extract the post ID from it
             # This is more reliable than trying to find the first post directly
-            thanks_buttons = soup.find_all(attrs={'id': re.compile(r'lnk_thanks_post\d+')})
-
-            if thanks_buttons and isinstance(thanks_buttons[0], Tag):
-                # Take the first thanks button's ID and extract the post ID
-                first_button = thanks_buttons[0]
-                if first_button and isinstance(first_button, Tag):
-                    button_id = first_button.get('id', '') if isinstance(thanks_buttons[0], Tag) else ''
-                if isinstance(button_id, str) and button_id.startswith('lnk_thanks_post'):
-                    post_id = button_id.replace('lnk_thanks_post', '')
-                    logger.info(f"✅ Found first thanks button: {button_id}, extracted post ID: {post_id}")
-                    return post_id
+            if thanks_button_id and thanks_button_id.startswith('lnk_thanks_post'):
+                post_id = thanks_button_id.replace('lnk_thanks_post', '')
+                logger.info(f"✅ Found first thanks button: {thanks_button_id}, extracted post ID: {post_id}")
+                return post_id
 
             # Fallback: Look for any elements with thanks in ID and extract post_id
-            thanks_elements = soup.find_all(attrs={'id': re.compile(r'thanks.*\d+')})
-            for elem in thanks_elements:
-                elem_id = elem.get('id', '') if isinstance(elem, Tag) else ''
-                if isinstance(elem_id, str):
-                    # Extract number from various thanks button ID patterns
-                    match = re.search(r'(\d+)', elem_id)
-                    if match:
-                        post_id = match.group(1)
-                        logger.info(f"✅ Extracted post ID from thanks element: {elem_id} -> {post_id}")
-                        return post_id
+            if thanks_id and thanks_digits:
+                post_id = thanks_digits.group(1)
+                logger.info(f"✅ Extracted post ID from thanks element: {thanks_id} -> {post_id}")
+                return post_id
 
             # OLD approaches as backup
             # Approach 1: Look for anchor links with post IDs
-            for link in soup.find_all('a', id=re.compile(r'post_\d+')):
-                link_id = link.get('id', '') if isinstance(link, Tag) else ''
-                if isinstance(link_id, str) and re.search(r'post_\d+', link_id):
-                    return link_id.replace('post_', '')
+            if anchor_id:
+                return anchor_id.replace('post_', '')
 
             # Approach 2: Look for post div elements
-            for post_div in soup.find_all('div', id=re.compile(r'^post_\d+')):
-                post_id = post_div.get('id', '') if isinstance(post_div, Tag) else ''
-                if isinstance(post_id, str) and 'post_' in post_id:
-                    return post_id.replace('post_', '')
+            if div_id:
+                return div_id.replace('post_', '')
 
             # Approach 3: Look for permalink elements
-            for permalink in soup.find_all('a', href=re.compile(r'post_id=\d+')):
-                href = permalink.get('href', '') if isinstance(permalink, Tag) else ''
-                if isinstance(href, str):
-                    match = re.search(r'post_id=(\d+)', href)
-                    if match:
-                        return match.group(1)
+            if permalink_match:
+                return permalink_match.group(1)
 
             logger.info("⚠️ Could not find thanks buttons or post IDs - magnets may already be unlocked")
             return None
@@ -233,9 +340,18 @@ class MagnetUnlocker:
             logger.error(f"❌ Error finding thanks button: {str(e)}")
             return None
 
-    def _click_thanks_button(self, thread_url: str, button_id: str) -> bool:
+    def _click_thanks_button(self, thread_url: str, button_id: str, thanks_href: Optional[str] = None) -> bool:
         """
         Click the thanks button - multiple approaches
+
+        Args:
+            thread_url: Thread page URL (sent as Referer)
+            button_id: ID of the thanks button, like lnk_thanks_post123
+            thanks_href: The button's href as found on the already fetched thread page; without it
+                the thanks URL is built from the post and forum IDs
+
+        Returns:
+            bool: False only if no request could be made
         """
         try:
             if not self.session:
@@ -246,8 +362,8 @@ class MagnetUnlocker:
             post_id = button_id.replace('lnk_thanks_post', '')
 
             # Extract thread ID and forum ID from the thread URL
-            thread_match = re.search(r'viewtopic\.php\?(?:.*&)?t=(\d+)', thread_url)
-            forum_match = re.search(r'viewtopic\.php\?(?:.*&)?f=(\d+)', thread_url)
+            thread_match = _THREAD_ID_RE.search(thread_url)
+            forum_match = _FORUM_ID_RE.search(thread_url)
 
             thread_id = thread_match.group(1) if thread_match else '0'
             forum_id = forum_match.group(1) if forum_match else '0'
@@ -258,24 +374,11 @@ class MagnetUnlocker:
 
             logger.info(f"🔄 Attempting to click thanks button for post {post_id} (Approach 1)")
 
-            # First, get the page to see what the thanks button href actually is
-            response = self.session.get(thread_url, timeout=30)
-            if response.status_code != 200:
-                logger.error(f"❌ Can't get thread page to find thanks URL")
-                return False
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-            thanks_btn = soup.find('a', id=button_id)
-
-            if thanks_btn and hasattr(thanks_btn, 'get') and isinstance(thanks_btn, Tag):
-                # Get the actual href from the button
-                actual_href = thanks_btn.get('href', '')
-                if isinstance(actual_href, str) and actual_href:
-                    if actual_href.startswith('./'):
-                        actual_href = actual_href[2:]  # Remove leading ./
-                    actual_thanks_url = f"{self.base_url}/{actual_href}"
-                    logger.info(f"🔗 Using actual button href: {actual_thanks_url}")
-                    thanks_url = actual_thanks_url
+            if thanks_href:
+                # Use the actual href of the button (read from the page the caller already parsed)
+                actual_href = thanks_href[2:] if thanks_href.startswith('./') else thanks_href
+                thanks_url = f"{self.base_url}/{actual_href}"
+                logger.info(f"🔗 Using actual button href: {thanks_url}")
 
             # Try the AJAX call
             headers = {
@@ -320,126 +423,130 @@ class MagnetUnlocker:
                 logger.error(f"❌ Failed to fetch thread: {response.status_code}")
                 return False
 
-            soup = BeautifulSoup(response.text, 'html.parser')
+            return self._unlock_page(thread_url, _make_soup(response))[0]
+
+        except Exception as e:
+            logger.error(f"❌ Error in unlock_magnets: {str(e)}")
+            return False
+
+    def _unlock_page(self, thread_url: str, soup: BeautifulSoup) -> Tuple[bool, bool]:
+        """
+        Unlock the magnets of an already fetched thread page.
+
+        Args:
+            thread_url: Thread page URL
+            soup: Parsed thread page
 
+        Returns:
+            Tuple[bool, bool]: Whether unlocking succeeded (or was not needed), and whether the
+            thanks button was actually clicked - only then does the page need fetching again
+        """
+        try:
             # Step 2: Extract first post ID
             post_id = self._extract_first_post_id(soup)
             if not post_id:
                 logger.info("⚠️ No first post ID found - assuming magnets are already unlocked")
-                return True
+                return True, False
 
             # Step 3: Look for thanks button
             button_id = self._find_thanks_button(soup, post_id)
             if not button_id:
                 logger.info("⚠️ Thanks button not found - magnets are likely already unlocked")
-                return True
+                return True, False
 
-            # Step 4: Click the thanks button
-            success = self._click_thanks_button(thread_url, button_id)
+            # Step 4: Click the thanks button (its href comes from this page, no refetch needed)
+            thanks_btn = soup.find('a', id=button_id)
+            thanks_href = thanks_btn.get('href') if isinstance(thanks_btn, Tag) else None
+            success = self._click_thanks_button(
+                thread_url, button_id, thanks_href if isinstance(thanks_href, str) else None
+            )
             if success:
                 logger.info("✅ Magnet unlocking process completed")
-                return True
+                return True, True
             else:
                 logger.warning("⚠️ Magnet unlocking may have failed")
-                return False
+                return False, False
 
         except Exception as e:
             logger.error(f"❌ Error in unlock_magnets: {str(e)}")
-            return False
+            return False, False
+
+    def _find_first_post_container(self, soup: BeautifulSoup) -> Optional[Tag]:
+        """
+        Find the container of the first post in a single walk over the page.
+
+        Of the most specific container kind present (see _post_container_rank), the first one
+        with any text is the post at the top of the page. The walk stops at the first postbody.
+
+        Args:
+            soup: Parsed thread page
+
+        Returns:
+            Optional[Tag]: First post container, or None if the page has none
+        """
+        first_post = None
+        best_rank = None
+        for tag in soup.descendants:
+            if not isinstance(tag, Tag):
+                continue
+            rank = _post_container_rank(tag)
+            if rank is None or (best_rank is not None and rank >= best_rank):
+                continue
+            if not tag.get_text(strip=True):
+                continue
+            first_post, best_rank = tag, rank
+            if rank == 0:
+                break
+        return first_post
 
     def extract_magnets_with_unlock(self, thread_url: str) -> List[str]:
         """
         Extract magnets from a thread, unlocking first if needed
         ONLY extracts from the FIRST POST to avoid duplicates
+
+        Keeps no per-call state on the unlocker, so the indexer calls it for several threads
+        at once over the shared (pooled) session.
         """
         if not self.session:
             logger.error("❌ Session not available")
             return []
 
-        # Try to unlock first (will handle the case where it's already unlocked)
-        unlock_success = self.unlock_magnets(thread_url)
-        if not unlock_success:
-            logger.warning("⚠️ Unlock process failed, but continuing with extraction")
-
-        # Now extract magnets (give page a moment to update if unlock happened)
         try:
+            # Fetch the thread once; it is only fetched again if a thanks click changed it
+            logger.info(f"📄 Fetching thread: {thread_url}")
             response = self.session.get(thread_url, timeout=30)
             if response.status_code != 200:
-                logger.error(f"❌ Failed to fetch thread after unlock: {response.status_code}")
+                logger.error(f"❌ Failed to fetch thread: {response.status_code}")
                 return []
 
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            # Find all magnet links from FIRST POST ONLY
-            magnet_pattern = re.compile(r'magnet:\?xt=urn:btih:[a-zA-Z0-9]{40}.*$')
-            magnets = []
+            soup = _make_soup(response)
 
-            # Step 1: Get the first post ID (we already have the method for this)
-            first_post_id = self._extract_first_post_id(soup)
+            # Try to unlock first (will handle the case where it's already unlocked)
+            unlock_success, clicked = self._unlock_page(thread_url, soup)
+            if not unlock_success:
+                logger.warning("⚠️ Unlock process failed, but continuing with extraction")
 
-            # NEW APPROACH: Find the first post by looking for post containers
-            # and taking the chronologically first one (TOP of the page)
-            all_post_containers: List[Tag] = []
+            if clicked:
+                # Now extract magnets from the page as it looks after the unlock
+                response = self.session.get(thread_url, timeout=30)
+                if response.status_code != 200:
+                    logger.error(f"❌ Failed to fetch thread after unlock: {response.status_code}")
+                    return []
 
-            # Look for common phpBB post container patterns
-            pattern_candidates = [
-                [e for e in soup.find_all('div', class_=re.compile(r'postbody')) if isinstance(e, Tag)],
-                [e for e in soup.find_all('div', class_=re.compile(r'post-text')) if isinstance(e, Tag)],
-                [e for e in soup.find_all('div', class_=re.compile(r'content')) if isinstance(e, Tag)],
-                [e for e in soup.find_all('div', class_=re.compile(r'post')) if isinstance(e, Tag)],
-                [e for e in soup.find_all('article', class_=re.compile(r'post')) if isinstance(e, Tag)],
-                [e for e in soup.find_all('div', attrs={'data-post-id': True}) if isinstance(e, Tag)],
-                [e for e in soup.find_all(['div', 'li'], class_=re.compile(r'(post|content)')) if isinstance(e, Tag)],
-            ]
-
-            for candidate_list in pattern_candidates:
-                if candidate_list and len(candidate_list) > 0:
-                    all_post_containers.extend(candidate_list)
+                soup = _make_soup(response)
 
-            # Remove duplicates based on content
-            seen_posts = set()
-            unique_post_containers = []
-            for post in all_post_containers:
-                post_text = post.get_text(strip=True)[:100]  # First 100 chars as fingerprint
-                if post_text and post_text not in seen_posts:
-                    seen_posts.add(post_text)
-                    unique_post_containers.append(post)
+            # Find the first post: the top-most non-empty container of the most specific kind
+            first_post = self._find_first_post_container(soup)
 
-            logger.info(f"📝 Found {len(unique_post_containers)} unique post containers")
-
-            # Take the FIRST post container (chronologically first)
-            if unique_post_containers:
-                first_post = unique_post_containers[0]
+            if first_post is not None:
                 logger.info("✅ Using first post container for magnet extraction")
 
                 # Extract magnets ONLY from this first post
-                for link in first_post.find_all('a', href=magnet_pattern):
-                    if isinstance(link, Tag) and link.has_attr('href'):
-                        href=link['href']
-                        if isinstance(href, str):
-                            magnet_url = href.strip()
-                            magnet_url = re.sub(r'\s+', '', magnet_url)  # Remove whitespace
-                            magnet_url = magnet_url.split('#')[0]  # Remove fragments
-
-                    if magnet_pattern.match(magnet_url):
-                        # Avoid duplicates
-                        if magnet_url not in magnets:
-                            magnets.append(magnet_url)
-                            logger.debug(f"🧲 Found magnet from first post: {magnet_url[:50]}...")
+                magnets = _collect_magnets(first_post)
             else:
                 logger.warning("⚠️ No post containers found, extracting from entire page")
                 # Extreme fallback: search the entire page
-                for link in soup.find_all('a', href=magnet_pattern):
-                    if isinstance(link, Tag) and link.has_attr('href'):
-                        href = link['href']
-                        magnet_url = str(href).strip() if href else ''
-                    magnet_url = re.sub(r'\s+', '', magnet_url)
-                    magnet_url = magnet_url.split('#')[0]
-
-                    if magnet_pattern.match(magnet_url):
-                        if magnet_url not in magnets:
-                            magnets.append(magnet_url)
-                            logger.debug(f"🧲 Found magnet (page search): {magnet_url[:50]}...")
+                magnets = _collect_magnets(soup)
 
             logger.info(f"📋 Extracted {len(magnets)} magnets from first post after unlock attempt")
             return magnets
@@ -462,21 +569,22 @@ def diagnose_thanks_buttons() -> bool:
     if unlocker.session:
         response = unlocker.session.get(test_url, timeout=30)
         if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
+            tree = _parse_html(response.content)
+            if tree is None:
+                logger.error("❌ Empty thread page")
+                return False
 
-            # Look for all elements with "thanks" in the ID or href
-            thanks_elements = soup.find_all(attrs={'id': re.compile(r'thanks|thank', re.IGNORECASE)})
-            thanks_elements += soup.find_all(attrs={'href': re.compile(r'thanks|thank', re.IGNORECASE)})
+            # Look for all elements with "thanks" in the ID or href (one pass, in page order)
+            thanks_elements = _THANKS_ELEMENTS_XPATH(tree)
 
             logger.info(f"🎯 Found {len(thanks_elements)} thanks-related elements:")
             for elem in thanks_elements[:5]:  # Show first 5
-                if isinstance(elem, Tag):
-                    name = elem.name
-                    elem_id = elem.get('id', '')
-                    elem_class = elem.get('class', '')
-                    href = elem.get('href', '')
-                    elem_href = str(href)[:50] if href else ''
-                    logger.info(f"  - Tag: {name}, ID: {elem_id}, Class: {elem_class}, Href: {elem_href}...")
+                name = elem.tag
+                elem_id = elem.get('id', '')
+                elem_class = elem.get('class', '')
+                href = elem.get('href', '')
+                elem_href = href[:50] if href else ''
+                logger.info(f"  - Tag: {name}, ID: {elem_id}, Class: {elem_class}, Href: {elem_href}...")
 
             return True
         else:
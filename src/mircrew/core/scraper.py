@@ -10,7 +10,9 @@ import os
 import argparse
 import re
 import time
-from typing import Optional, List, Dict, Any, Union, Set, cast
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+from typing import Optional, List, Dict, Any, Pattern, Sequence, Union, Set, cast
 from bs4 import BeautifulSoup, Tag
 from bs4.element import NavigableString, PageElement
 
@@ -22,14 +24,39 @@ setup_logging()
 logger = get_logger(__name__)
 from datetime import datetime
 import requests
-from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
+from urllib3.util.retry import Retry
 
-from .auth import MirCrewLogin
+from .auth import MirCrewLogin, mount_session_adapter
 
 # Logging is now configured centrally in setup_logging() above
 
+# Threads whose pages are fetched at the same time in search_forum()
+_THREAD_WORKERS = 8
+
+# Transport-level retries for a standalone session: idempotent reads only, and the
+# final 5xx response is returned to _make_request_with_retry() rather than retried again
+_FETCH_RETRY = Retry(
+    total=3,
+    backoff_factor=0.3,
+    status_forcelist=(500, 502, 503, 504),
+    allowed_methods=frozenset(['GET', 'HEAD']),
+    raise_on_status=False
+)
+
+# Enhanced magnet patterns with more variations (compiled once, matched case-insensitively)
+_MAGNET_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'magnet:\?xt=urn:btih:[a-zA-Z0-9]{40}',  # Standard 40-char hash
+    r'magnet:\?xt=urn:btih:[a-zA-Z0-9]{32}',  # Shorter hash
+    r'magnet:\?xt=urn:btih%3A[a-zA-Z0-9%]{40,}',  # URL-encoded
+    r'magnet:\?[a-z]+=[^&]+&(?:.*&)*xt=urn:btih:[a-zA-Z0-9]{20,}',  # With parameters
+    r'magnet:\?xt=urn:btih:[^\'"\s<>&]{32,}'  # More flexible matching
+))
+_MAGNET_BTIH_RE = re.compile(r'xt=urn:btih:[a-zA-Z0-9]{20,}')
+_CODE_CLASS_RE = re.compile(r'code|bbcode|forumcode')
+_WHITESPACE_RE = re.compile(r'\s+')
+
 class MirCrewScraper:
     """
     Standalone MIRCrew forum scraper that works independently or with shared session
@@ -51,11 +78,10 @@ class MirCrewScraper:
             self.session_sharing = True
             logger.info("📋 Using shared authenticated session")
         else:
-            # Use connection pooling with max 10 connections
-            adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10)
+            # Same pooled adapter as the login session: the pool holds a keep-alive connection
+            # for every search_forum() worker, and all HTTPS pools share one SSL context
             self.session = requests.Session()
-            self.session.mount('https://', adapter)
-            self.session.mount('http://', adapter)
+            mount_session_adapter(self.session, _FETCH_RETRY)
             self.session_sharing = False
             # Set up browser-like headers if using own session
             default_ua = user_agent or 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
@@ -74,7 +100,6 @@ class MirCrewScraper:
             'User-Agent': user_agent,
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
             'Accept-Language': 'it-IT,it;q=0.9,en-US;q=0.8,en;q=0.7',
-            'Accept-Encoding': 'gzip, deflate, br',
             'DNT': '1',
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1',
@@ -196,7 +221,7 @@ class MirCrewScraper:
 
         # Parse search results
         try:
-            threads = self._parse_search_page(response.text)
+            threads = self._parse_search_page(response.content)
             logger.info(f"🎯 Found {len(threads)} threads in search results")
         except Exception as e:
             logger.error(f"❌ Failed to parse search results: {type(e).__name__}: {str(e)}")
@@ -206,16 +231,14 @@ class MirCrewScraper:
         threads_limited = threads[:max_results]
         all_magnets = []
 
-        for i, thread in enumerate(threads_limited, 1):
-            logger.info(f"🔗 Processing thread {i}/{len(threads_limited)}: {thread['title'][:60]}...")
-
-            try:
-                magnets = self._extract_thread_magnets(thread)
-                logger.info(f"  └─ Found {len(magnets)} magnet(s) in thread")
-                all_magnets.extend(magnets)
-            except Exception as e:
-                logger.warning(f"  └─ ⚠️ Failed to extract magnets from thread: {type(e).__name__}: {str(e)}")
-                continue
+        # Fetch threads concurrently: each one is network-bound, and map keeps the result order
+        if threads_limited:
+            total = len(threads_limited)
+            workers = min(_THREAD_WORKERS, total)
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='mircrew-scraper') as executor:
+                for magnets in executor.map(self._process_thread, threads_limited,
+                                            range(1, total + 1), repeat(total)):
+                    all_magnets.extend(magnets)
 
         logger.info(f"🎉 Total results: {len(all_magnets)} magnet links from {len(threads_limited)} threads")
 
@@ -228,12 +251,37 @@ class MirCrewScraper:
         
         return results
 
+    def _process_thread(self, thread: Dict[str, str], position: int, total: int) -> List[Dict[str, Any]]:
+        """
+        Extract the magnets of one search result, logging instead of raising on failure.
+
+        Args:
+            thread: Thread information dictionary
+            position: 1-based position of the thread in the results
+            total: Number of threads being processed
+
+        Returns:
+            List of magnet information dictionaries (empty on failure)
+        """
+        logger.info(f"🔗 Processing thread {position}/{total}: {thread['title'][:60]}...")
+
+        try:
+            magnets = self._extract_thread_magnets(thread)
+            logger.info(f"  └─ Found {len(magnets)} magnet(s) in thread")
+            return magnets
+        except Exception as e:
+            logger.warning(f"  └─ ⚠️ Failed to extract magnets from thread: {type(e).__name__}: {str(e)}")
+            return []
+
     def _make_request_with_retry(self, url: str, method: str = 'GET', params: Optional[Dict[str, Any]] = None,
                                 data=None, desc: str = "request", timeout: int = 30,
                                 max_attempts: Optional[int] = None) -> Optional[requests.Response]:
         """
         Make HTTP request with retry logic and exponential backoff.
 
+        Network errors are retried here; an error status is final, since the session
+        adapter has already retried 5xx answers.
+
         Args:
             url: Target URL
             method: HTTP method (GET/POST)
@@ -243,7 +291,7 @@ class MirCrewScraper:
             max_attempts: Maximum retry attempts (uses self.max_retries if None)
 
         Returns:
-            Response object or None if all attempts fail
+            Response object or None on an error status or if all attempts fail
         """
         if max_attempts is None:
             max_attempts = self.max_retries
@@ -262,7 +310,9 @@ class MirCrewScraper:
                     logger.debug(f"✅ {desc.capitalize()} successful: {response.status_code}")
                     return response
                 else:
-                    logger.warning(f"⚠️ {desc.capitalize()} returned {response.status_code} (attempt {attempt + 1})")
+                    # The session adapter has already retried 5xx answers; another round would multiply them
+                    logger.error(f"❌ {desc.capitalize()} returned {response.status_code} (attempt {attempt + 1})")
+                    return None
 
             except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
                 logger.warning(f"⚠️ {desc.capitalize()} network error (attempt {attempt + 1}): {type(e).__name__}")
@@ -276,10 +326,10 @@ class MirCrewScraper:
         logger.error(f"💀 {desc.capitalize()} failed after {max_attempts} attempts")
         return None
 
-    def _parse_search_page(self, html_content: str) -> List[Dict[str, str]]:
-        """Parse the search results HTML to extract thread information"""
+    def _parse_search_page(self, html_content: Union[str, bytes]) -> List[Dict[str, str]]:
+        """Parse the search results HTML (text, or raw bytes left for lxml to decode) to extract thread information"""
 
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = BeautifulSoup(html_content, 'lxml')
         threads = []
 
         for row in soup.find_all('li', class_='row'):
@@ -345,24 +395,16 @@ class MirCrewScraper:
                 logger.warning(f"⚠️ Failed to fetch thread: HTTP {response.status_code if response else 'N/A'}")
                 return magnets
 
-            soup = BeautifulSoup(response.text, 'html.parser')
-            logger.debug(f"✅ Thread page parsed successfully ({len(response.text)} chars)")
-
-            # Enhanced magnet patterns with more variations
-            magnet_patterns = [
-                r'magnet:\?xt=urn:btih:[a-zA-Z0-9]{40}',  # Standard 40-char hash
-                r'magnet:\?xt=urn:btih:[a-zA-Z0-9]{32}',  # Shorter hash
-                r'magnet:\?xt=urn:btih%3A[a-zA-Z0-9%]{40,}',  # URL-encoded
-                r'magnet:\?[a-z]+=[^&]+&(?:.*&)*xt=urn:btih:[a-zA-Z0-9]{20,}',  # With parameters
-                r'magnet:\?xt=urn:btih:[^\'"\s<>&]{32,}'  # More flexible matching
-            ]
+            # Raw bytes: lxml detects the page encoding itself, no separate decode pass
+            soup = BeautifulSoup(response.content, 'lxml')
+            logger.debug(f"✅ Thread page parsed successfully ({len(response.content)} bytes)")
 
             # Search strategies ordered by reliability
             search_strategies = [
-                ('direct_links', lambda: self._find_magnet_links(soup, magnet_patterns)),
-                ('text_content', lambda: self._find_magnet_in_text(soup, magnet_patterns)),
-                ('attributes', lambda: self._find_magnet_in_attributes(soup, magnet_patterns)),
-                ('code_blocks', lambda: self._find_magnet_in_code(soup, magnet_patterns))
+                ('direct_links', lambda: self._find_magnet_links(soup, _MAGNET_PATTERNS)),
+                ('text_content', lambda: self._find_magnet_in_text(soup, _MAGNET_PATTERNS)),
+                ('attributes', lambda: self._find_magnet_in_attributes(soup, _MAGNET_PATTERNS)),
+                ('code_blocks', lambda: self._find_magnet_in_code(soup, _MAGNET_PATTERNS))
             ]
 
             for strategy_name, strategy_func in search_strategies:
@@ -382,18 +424,18 @@ class MirCrewScraper:
 
         return magnets
 
-    def _find_magnet_links(self, soup: BeautifulSoup, patterns: List[str]) -> List[str]:
+    def _find_magnet_links(self, soup: BeautifulSoup, patterns: Sequence[Pattern[str]]) -> List[str]:
         """Find magnets in direct <a> tags"""
         magnets = []
         for pattern in patterns:
-            for link in soup.find_all('a', href=re.compile(pattern, re.IGNORECASE)):
+            for link in soup.find_all('a', href=pattern):
                 # FIXME: Phase 2 - Refactor BeautifulSoup typing
                 magnet_url = link.get('href', '').strip()  # type: ignore[union-attr]
                 if magnet_url and self._is_valid_magnet(magnet_url):
                     magnets.append(magnet_url)
         return magnets
 
-    def _find_magnet_in_text(self, soup: BeautifulSoup, patterns: List[str]) -> List[str]:
+    def _find_magnet_in_text(self, soup: BeautifulSoup, patterns: Sequence[Pattern[str]]) -> List[str]:
         """Find magnets in text content of various elements"""
         magnets = []
         text_elements = soup.find_all(['div', 'p', 'code', 'span', 'blockquote'])
@@ -401,14 +443,14 @@ class MirCrewScraper:
         for element in text_elements:
             text_content = element.get_text()
             for pattern in patterns:
-                matches = re.findall(pattern, text_content, re.IGNORECASE)
+                matches = pattern.findall(text_content)
                 for match in matches:
                     if self._is_valid_magnet(match):
                         magnets.append(match)
 
         return magnets
 
-    def _find_magnet_in_attributes(self, soup: BeautifulSoup, patterns: List[str]) -> List[str]:
+    def _find_magnet_in_attributes(self, soup: BeautifulSoup, patterns: Sequence[Pattern[str]]) -> List[str]:
         """Find magnets in HTML attributes like onclick, data-href, etc."""
         magnets = []
         attr_patterns = ['onclick', 'data-href', 'data-magnet', 'value']
@@ -419,22 +461,22 @@ class MirCrewScraper:
                 attr_value = element.get(attr, '')  # type: ignore[union-attr]
                 for pattern in patterns:
                     # FIXME: Phase 2 - Ensure string type for regex
-                    matches = re.findall(pattern, str(attr_value), re.IGNORECASE)
+                    matches = pattern.findall(str(attr_value))
                     for match in matches:
                         if self._is_valid_magnet(match):
                             magnets.append(match)
 
         return magnets
 
-    def _find_magnet_in_code(self, soup: BeautifulSoup, patterns: List[str]) -> List[str]:
+    def _find_magnet_in_code(self, soup: BeautifulSoup, patterns: Sequence[Pattern[str]]) -> List[str]:
         """Find magnets in <pre>, <code> blocks and forum code tags"""
         magnets = []
-        code_elements = soup.find_all(['pre', 'code', 'div'], class_=re.compile(r'code|bbcode|forumcode'))
+        code_elements = soup.find_all(['pre', 'code', 'div'], class_=_CODE_CLASS_RE)
 
         for element in code_elements:
             text_content = element.get_text()
             for pattern in patterns:
-                matches = re.findall(pattern, text_content, re.IGNORECASE)
+                matches = pattern.findall(text_content)
                 for match in matches:
                     if self._is_valid_magnet(match):
                         magnets.append(match)
@@ -457,7 +499,7 @@ class MirCrewScraper:
             return False
 
         # Must have basic parameters
-        if not re.search(r'xt=urn:btih:[a-zA-Z0-9]{20,}', url_lower):
+        if not _MAGNET_BTIH_RE.search(url_lower):
             return False
 
         return True
@@ -467,7 +509,7 @@ class MirCrewScraper:
         """Process and add a magnet URL to results"""
         # Clean up the magnet URL
         magnet_url = magnet_url.split('#')[0]  # Remove fragments
-        magnet_url = re.sub(r'\s+', '', magnet_url)  # Remove whitespace
+        magnet_url = _WHITESPACE_RE.sub('', magnet_url)  # Remove whitespace
 
         # Only add if not already found
         if magnet_url not in found_magnets:
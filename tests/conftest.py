@@ -0,0 +1,11 @@
+"""Shared pytest fixtures."""
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_cookie_cache(tmp_path, monkeypatch):
+    """Keep MirCrewLogin's persisted cookies out of the real home directory."""
+    cache_path = tmp_path / 'cookies.json'
+    monkeypatch.setenv('MIRCREW_COOKIE_CACHE', str(cache_path))
+    return cache_path
@@ -58,12 +58,13 @@ class TestFullSearchIntegration(unittest.TestCase):
             <input name="sid" value="test_sid_456">
         </form>
         '''
+        mock_login_page.iter_content.side_effect = lambda chunk_size: iter([mock_login_page.text.encode()])
         mock_get.return_value = mock_login_page
 
         # Mock successful login response
         mock_login_response = MagicMock()
         mock_login_response.status_code = 200
-        mock_login_response.text = '<title>Logged in - Forum</title>'
+        mock_login_response.content = b'<title>Logged in - Forum</title>'
         mock_login_response.url = 'https://mircrew-releases.org/index.php'
         mock_post.return_value = mock_login_response
 
@@ -7,7 +7,26 @@ Tests authentication functionality with mocking to avoid actual network calls.
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 import requests
-from src.mircrew.core.auth import MirCrewLogin
+from src.mircrew.core.auth import (
+    MirCrewLogin, _UA_PROFILES, _UA_WEIGHTS, _extract_login_form_fields, _parse_html, _shared_ssl_context
+)
+
+# phpBB index page as a guest sees it (login form in the navbar) and as a member sees it
+GUEST_INDEX_PAGE = (
+    b'<html><body><div class="navbar"><ul>'
+    b'<li><a href="./ucp.php?mode=login">Login</a></li><li><a href="./ucp.php?mode=register">Registrati</a></li>'
+    b'</ul></div><form action="./ucp.php?mode=login" method="post">'
+    b'<input name="username"/><input name="password" type="password"/></form>'
+    b'<ul class="topiclist forums"><li class="row"><a href="./viewforum.php?f=25" class="forumtitle">Film</a>'
+    b'<dd class="topics">1234 Threads</dd><dd class="posts">5678 Posts</dd></li></ul>'
+    b'</body></html>'
+)
+MEMBER_INDEX_PAGE = (
+    b'<html><body><div class="navbar"><ul>'
+    b'<li><a href="./ucp.php?mode=logout&amp;sid=abc123">Esci [ user ]</a></li>'
+    b'</ul></div><ul class="topiclist forums"><li class="row">'
+    b'<a href="./viewforum.php?f=25" class="forumtitle">Film</a></li></ul></body></html>'
+)
 
 
 class TestMirCrewAuth:
@@ -148,6 +167,152 @@ class TestMirCrewAuth:
         assert any('Error establishing session' in str(call)
                   for call in mock_logger.warning.call_args_list)
 
+    @patch('time.sleep')
+    @patch.dict('os.environ', {'MIRCREW_USERNAME': 'testuser', 'MIRCREW_PASSWORD': 'testpass'})
+    @patch('src.mircrew.core.auth.requests.Session')
+    def test_login_gives_up_after_repeated_unknown_failures(self, mock_session_class, mock_sleep):
+        """Test that unrecognised login failures abort well before max_attempts."""
+        mock_session = Mock()
+        login_page = Mock(status_code=200, url='https://mircrew-releases.org/ucp.php?mode=login')
+        login_page.iter_content.side_effect = lambda chunk_size: iter([
+            b'<form action="./ucp.php?mode=login" method="post">',
+            b'<input name="form_token" value="token456"/></form>',
+        ])
+        mock_session.get.return_value = login_page
+        mock_session.post.return_value = Mock(
+            status_code=200,
+            url='https://mircrew-releases.org/ucp.php?mode=login',
+            content=b'<html><body>Something unexpected</body></html>'
+        )
+        mock_session_class.return_value = mock_session
+
+        auth = MirCrewLogin()
+        result = auth.login(max_attempts=10)
+
+        assert result is False
+        assert mock_session.post.call_count == 3
+        # Homepage + login page once, then only the login page on each retry
+        assert mock_session.get.call_count == 4
+
+    @patch('time.sleep')
+    @patch.dict('os.environ', {'MIRCREW_USERNAME': 'user', 'MIRCREW_PASSWORD': 'secret'})
+    @patch('src.mircrew.core.auth.requests.Session')
+    def test_login_retries_missing_token_without_backoff(self, mock_session_class, mock_sleep):
+        """Test that a missing form token is retried at once, but not twice in a row."""
+        mock_session = Mock()
+        login_page = Mock(status_code=200)
+        login_page.iter_content.side_effect = lambda chunk_size: iter([
+            b'<form action="./ucp.php?mode=login" method="post"><input name="sid" value="abc"/></form>'
+        ])
+        mock_session.get.return_value = login_page
+        mock_session_class.return_value = mock_session
+
+        auth = MirCrewLogin(stealth=False)
+        result = auth.login(max_attempts=3)
+
+        assert result is False
+        mock_session.post.assert_not_called()
+        # Attempt 2 follows immediately, attempt 3 waits for the backoff
+        assert mock_sleep.call_count == 1
+
+    @patch('time.sleep')
+    @patch('src.mircrew.core.auth.requests.Session')
+    def test_establish_session_without_stealth_skips_pause(self, mock_session_class, mock_sleep):
+        """Test that stealth=False drops the cosmetic pause after the homepage visit."""
+        mock_session = Mock()
+        mock_session.get.return_value = Mock(status_code=200)
+        mock_session_class.return_value = mock_session
+
+        auth = MirCrewLogin(stealth=False)
+
+        assert auth._establish_session() is True
+        mock_sleep.assert_not_called()
+
+    @patch('time.sleep')
+    @patch('src.mircrew.core.auth.requests.Session')
+    def test_establish_session_prefetches_login_page(self, mock_session_class, mock_sleep):
+        """Test that the prefetched login page is reused instead of fetched twice."""
+        mock_session = Mock()
+        mock_session.get.return_value = Mock(status_code=200)
+        mock_session_class.return_value = mock_session
+
+        auth = MirCrewLogin()
+        assert auth._establish_session(prefetch_login=True) is True
+        response = auth._fetch_login_page()
+
+        assert response is mock_session.get.return_value
+        assert mock_session.get.call_count == 2
+        mock_session.get.assert_called_with(auth.login_url, allow_redirects=True, timeout=20, stream=True)
+
+    @patch('src.mircrew.core.auth.requests.Session')
+    def test_release_prefetch_closes_unread_login_page(self, mock_session_class):
+        """Test that an unconsumed prefetched login page is closed and the worker stopped."""
+        mock_session = Mock()
+        mock_session_class.return_value = mock_session
+
+        auth = MirCrewLogin()
+        auth._prefetch_login_page()
+        executor = auth._prefetch_executor
+        auth._release_prefetch()
+        executor.shutdown(wait=True)
+
+        mock_session.get.return_value.close.assert_called_once()
+        assert auth._prefetch_executor is None
+        assert auth._prefetched_login is None
+
+    def test_session_uses_shared_ssl_context(self):
+        """Test that HTTPS pools reuse one SSL context with the CA bundle preloaded."""
+        auth = MirCrewLogin()
+        adapter = auth.session.get_adapter(auth.login_url)
+
+        pool = adapter.poolmanager.connection_from_url(auth.login_url)
+        adapter.cert_verify(pool, auth.login_url, True, None)
+
+        assert pool.conn_kw['ssl_context'] is _shared_ssl_context()
+        assert pool.ca_certs is None
+
+    def test_setup_session_headers_drops_previous_profile(self):
+        """Test that rotating to Firefox leaves no Chrome-only headers behind."""
+        chrome = next(p for p in _UA_PROFILES if 'sec-ch-ua' in p[1])
+        firefox = next(p for p in _UA_PROFILES if 'Firefox' in p[0])
+        auth = MirCrewLogin()
+
+        with patch('src.mircrew.core.auth.random.choices', side_effect=[[chrome], [firefox]]), \
+                patch('src.mircrew.core.auth.random.getrandbits', side_effect=[1, 0]):
+            auth._setup_session_headers()
+            auth._setup_session_headers()
+
+        assert auth.session.headers['User-Agent'] == firefox[0]
+        assert 'sec-ch-ua' not in auth.session.headers
+        assert 'Referer' not in auth.session.headers
+
+    def test_user_agent_weights_cover_every_profile(self):
+        """Test that every user agent profile has a positive pick weight."""
+        assert len(_UA_WEIGHTS) == len(_UA_PROFILES)
+        assert all(weight > 0 for weight in _UA_WEIGHTS)
+
+    def test_session_adapter_pool_and_retries(self):
+        """Test that the login session mounts a tuned, retrying adapter."""
+        auth = MirCrewLogin()
+
+        for prefix in ('https://', 'http://'):
+            adapter = auth.session.get_adapter(prefix + 'mircrew-releases.org')
+            assert adapter._pool_maxsize == 16
+            assert adapter.max_retries.total == 3
+            assert 503 in adapter.max_retries.status_forcelist
+            assert 'POST' not in adapter.max_retries.allowed_methods
+
+    def test_log_connection_reuse_reads_serving_pool(self, caplog):
+        """Test that connection reuse is reported from the pool that served the login."""
+        response = Mock()
+        response.raw._pool.num_connections = 1
+        response.raw._pool.num_requests = 4
+
+        with caplog.at_level('DEBUG', logger='src.mircrew.core.auth'):
+            self.auth._log_connection_reuse(response)
+
+        assert '1 connection(s) opened for 4 request(s)' in caplog.text
+
 
 class TestValidationLogic:
     """Test login validation logic."""
@@ -163,7 +328,7 @@ class TestValidationLogic:
         response = Mock()
         response.status_code = 200
         response.url = 'https://mircrew-releases.org/index.php'
-        response.text = '<html><body>Welcome back! <a href="logout">Logout</a></body></html>'
+        response.content = b'<html><body>Welcome back! <a href="logout">Logout</a></body></html>'
 
         result = self.auth.validate_login(response)
         assert result is True
@@ -174,7 +339,7 @@ class TestValidationLogic:
         response = Mock()
         response.status_code = 200
         response.url = 'https://mircrew-releases.org/ucp.php?mode=login'
-        response.text = '<html><body>Invalid username or password</body></html>'
+        response.content = b'<html><body>Invalid username or password</body></html>'
 
         result = self.auth.validate_login(response)
         assert result is False
@@ -193,11 +358,67 @@ class TestValidationLogic:
         response = Mock()
         response.status_code = 200
         response.url = 'https://mircrew-releases.org/ucp.php?mode=login'
-        response.text = 'Il form inviato non è valido'
+        response.content = 'Il form inviato non è valido'.encode('utf-8')
 
         result = self.auth.validate_login(response)
         # This might return False or True depending on URL and other conditions
 
+    def test_extract_form_data_prefers_login_form(self):
+        """Test that the login form wins over earlier forms on the page."""
+        html = (
+            '<html><body>'
+            '<form action="./search.php"><input name="keywords" value="matrix"/></form>'
+            '<form action="./ucp.php?mode=login" method="post">'
+            '<input name="username"/><input name="form_token" value="token456"/>'
+            '<input name="sid" value="abc"/><input type="submit" value="Login"/>'
+            '</form></body></html>'
+        )
+
+        form_data = _extract_login_form_fields(_parse_html(html))
+
+        assert form_data == {'username': '', 'form_token': 'token456', 'sid': 'abc'}
+        assert _extract_login_form_fields(_parse_html(html.encode('utf-8'))) == form_data
+
+    def test_read_login_form_stops_parsing_at_login_form(self):
+        """Test that the streamed login form is read and the rest is drained unparsed."""
+        drained = []
+
+        def chunks():
+            yield b'<html><body><form action="./search.php"><input name="keywords"/></form>'
+            yield (b'<form action="./ucp.php?mode=login" method="post">'
+                   b'<input name="form_token" value="token456"/><input name="sid" value="abc"/></form>')
+            drained.append(True)
+            yield b'<div>footer</div></body></html>'
+
+        response = Mock()
+        response.iter_content.return_value = chunks()
+
+        form_data = self.auth._read_login_form(response)
+
+        assert form_data == {'form_token': 'token456', 'sid': 'abc'}
+        assert drained == [True]
+
+    @patch('src.mircrew.core.auth._parse_html')
+    def test_validate_login_success_skips_parse(self, mock_parse):
+        """Test that a clean redirect away from the login page is decided without parsing."""
+        response = Mock()
+        response.status_code = 200
+        response.url = 'https://mircrew-releases.org/index.php'
+        response.content = b'<html><body><a href="./ucp.php?mode=logout">Logout</a></body></html>'
+
+        assert self.auth.validate_login(response) is True
+        mock_parse.assert_not_called()
+
+    def test_validate_login_error_box(self):
+        """Test that credential errors in phpBB error boxes fail validation."""
+        response = Mock()
+        response.status_code = 200
+        response.url = 'https://mircrew-releases.org/index.php'
+        response.content = (b'<html><body><div class="Error">Invalid username supplied.</div>'
+                            b'<a href="logout">Logout</a></body></html>')
+
+        assert self.auth.validate_login(response) is False
+
 
 class TestSessionPersistence:
     """Test session persistence validation."""
@@ -214,7 +435,8 @@ class TestSessionPersistence:
         mock_response = Mock()
         mock_response.status_code = 200
         mock_response.url = 'https://mircrew-releases.org/index.php'
-        mock_response.text = 'Logout My Account Profile'
+        mock_response.encoding = 'utf-8'
+        mock_response.iter_content.return_value = iter([MEMBER_INDEX_PAGE])
         mock_session.get.return_value = mock_response
         mock_session_class.return_value = mock_session
 
@@ -223,6 +445,26 @@ class TestSessionPersistence:
 
         assert result is True
 
+    @patch('src.mircrew.core.auth.requests.Session')
+    def test_is_logged_in_login_form_past_probe(self, mock_session_class):
+        """Test that the full page is checked when the header has no indicators."""
+        mock_session = Mock()
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.url = 'https://mircrew-releases.org/index.php'
+        mock_response.encoding = 'utf-8'
+        mock_response.iter_content.return_value = iter([
+            b'<html><head></head><body>',
+            b'<form action="./ucp.php?mode=login" method="post"></form></body></html>',
+        ])
+        mock_session.get.return_value = mock_response
+        mock_session_class.return_value = mock_session
+
+        auth = MirCrewLogin()
+        result = auth.is_logged_in()
+
+        assert result is False
+
     @patch('src.mircrew.core.auth.requests.Session')
     def test_is_logged_in_redirect_to_login(self, mock_session_class):
         """Test session invalidation when redirected to login."""
@@ -237,6 +479,22 @@ class TestSessionPersistence:
 
         assert result is False
 
+    @patch('src.mircrew.core.auth.requests.Session')
+    def test_is_logged_in_head_redirect(self, mock_session_class):
+        """Test that a redirect away from the login page skips the page download."""
+        mock_session = Mock()
+        mock_session.head.return_value = Mock(
+            status_code=302,
+            headers={'Location': 'https://mircrew-releases.org/index.php?sid=abc'}
+        )
+        mock_session_class.return_value = mock_session
+
+        auth = MirCrewLogin()
+        result = auth.is_logged_in()
+
+        assert result is True
+        mock_session.get.assert_not_called()
+
     @patch('src.mircrew.core.auth.requests.Session')
     def test_is_logged_in_network_error(self, mock_session_class):
         """Test handling of network errors during session validation."""
@@ -249,6 +507,96 @@ class TestSessionPersistence:
 
         assert result is False
 
+    def test_cookie_cache_round_trip(self, isolated_cookie_cache):
+        """Test that saved cookies are owner-only and restored by the next client."""
+        auth = MirCrewLogin()
+        auth.session.cookies.set('phpbb3_34c6d_sid', 'abc123', domain='mircrew-releases.org')
+        auth._save_cookies()
+
+        assert isolated_cookie_cache.stat().st_mode & 0o777 == 0o600
+
+        restored = MirCrewLogin()
+        assert restored._cookies_restored is True
+        assert restored.session.cookies.get('phpbb3_34c6d_sid') == 'abc123'
+
+    @patch('src.mircrew.core.auth.requests.Session')
+    def test_is_logged_in_guest_page(self, mock_session_class):
+        """Test that a guest index page, full of forum/thread/post words, is not a session."""
+        mock_session = Mock()
+        mock_session.head.return_value = Mock(status_code=200, headers={})
+        mock_session.get.return_value = Mock(
+            status_code=200,
+            url='https://mircrew-releases.org/index.php'
+        )
+        mock_session.get.return_value.iter_content.return_value = iter([GUEST_INDEX_PAGE])
+        mock_session_class.return_value = mock_session
+
+        auth = MirCrewLogin()
+
+        assert auth.is_logged_in() is False
+
+    def test_cookie_cache_rejects_malformed_entries(self, isolated_cookie_cache):
+        """Test that a corrupt or foreign cookie cache is ignored instead of crashing startup."""
+        for content in ('42', '[{"name": "sid"}]', '{"sid": "abc"}', '\x80\x04K*.'):
+            isolated_cookie_cache.write_text(content, encoding='utf-8')
+
+            auth = MirCrewLogin()
+
+            assert auth._cookies_restored is False
+            assert len(auth.session.cookies) == 0
+
+    @patch.dict('os.environ', {'MIRCREW_USERNAME': 'user', 'MIRCREW_PASSWORD': 'secret'})
+    def test_login_reuses_cached_session(self, isolated_cookie_cache):
+        """Test that valid cached cookies skip the login round-trips."""
+        MirCrewLogin()._save_cookies()
+
+        auth = MirCrewLogin()
+        index = Mock(status_code=200, url='https://mircrew-releases.org/index.php')
+        index.iter_content.return_value = iter([MEMBER_INDEX_PAGE])
+        with patch.object(auth.session, 'head', return_value=Mock(status_code=200, headers={})), \
+                patch.object(auth.session, 'get', return_value=index), \
+                patch.object(auth, '_establish_session') as mock_establish:
+            assert auth.login() is True
+
+        mock_establish.assert_not_called()
+
+    @patch('time.sleep')
+    @patch.dict('os.environ', {'MIRCREW_USERNAME': 'user', 'MIRCREW_PASSWORD': 'secret'})
+    def test_login_rejects_expired_cached_session(self, mock_sleep, isolated_cookie_cache):
+        """Test that cached cookies answered with a guest page lead to a real login."""
+        seed = MirCrewLogin()
+        seed.session.cookies.set('phpbb3_34c6d_sid', 'stale', domain='mircrew-releases.org')
+        seed._save_cookies()
+
+        auth = MirCrewLogin()
+        index = Mock(status_code=200, url='https://mircrew-releases.org/index.php')
+        index.iter_content.return_value = iter([GUEST_INDEX_PAGE])
+        with patch.object(auth.session, 'head', return_value=Mock(status_code=200, headers={})), \
+                patch.object(auth.session, 'get', return_value=index), \
+                patch.object(auth, '_establish_session', return_value=False) as mock_establish, \
+                patch.object(auth, '_fetch_login_page', side_effect=requests.exceptions.Timeout):
+            assert auth.login(max_attempts=1) is False
+
+        mock_establish.assert_called_once()
+        assert auth.session.cookies.get('phpbb3_34c6d_sid') is None
+
+    @patch('src.mircrew.core.auth.requests.Session')
+    def test_logout_uses_cached_session_id(self, mock_session_class):
+        """Test that logout sends the session ID cached at login without following redirects."""
+        mock_session = Mock()
+        mock_session.get.return_value = Mock(status_code=302)
+        mock_session_class.return_value = mock_session
+
+        auth = MirCrewLogin()
+        auth._sid = 'abc123'
+
+        assert auth.logout() is True
+        mock_session.get.assert_called_once_with(
+            'https://mircrew-releases.org/ucp.php?mode=logout&sid=abc123',
+            allow_redirects=False,
+            timeout=10
+        )
+
 
 if __name__ == '__main__':
     pytest.main([__file__])
\ No newline at end of file
@@ -65,6 +65,60 @@ fields:
         assert '25' in indexer.cat_mappings
         assert len(indexer.default_sizes) > 0
 
+    def test_config_size_override_leaves_fallback_untouched(self):
+        """Test that config size overrides never modify the shared fallback table."""
+        from src.mircrew.core.indexer import _DEFAULT_SIZES
+
+        config_data = """---
+caps:
+  categorymappings:
+    - {id: 25, cat: Movies, desc: "Video Releases"}
+fields:
+  size_default:
+    case:
+      'a[href*="f=25"]': 4GB
+"""
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.yml', delete=False) as f:
+            f.write(config_data)
+            config_path = f.name
+
+        try:
+            with patch('src.mircrew.core.indexer.requests.Session'):
+                indexer = MirCrewIndexer(config_path=config_path)
+                fallback = MirCrewIndexer(config_path='/nonexistent/path.yml')
+        finally:
+            os.unlink(config_path)
+
+        assert indexer.default_sizes['Movies'] == '4GB'
+        assert _DEFAULT_SIZES['Movies'] == '10GB'
+        assert fallback.default_sizes['Movies'] == '10GB'
+
+    def test_config_is_parsed_once_per_file_version(self):
+        """Test that indexers share the parsed config until the file changes."""
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.yml', delete=False) as f:
+            f.write("caps:\n  categorymappings:\n    - {id: 25, cat: Movies}\n")
+            config_path = f.name
+
+        try:
+            with patch('src.mircrew.core.indexer.requests.Session'), \
+                 patch('src.mircrew.core.indexer.yaml.load', wraps=__import__('yaml').load) as mock_load:
+                first = MirCrewIndexer(config_path=config_path)
+                second = MirCrewIndexer(config_path=config_path)
+                assert mock_load.call_count == 1
+                assert second.cat_mappings is first.cat_mappings
+
+                with open(config_path, 'w') as f:
+                    f.write("caps:\n  categorymappings:\n    - {id: 51, cat: TV}\n")
+                os.utime(config_path, ns=(0, os.stat(config_path).st_mtime_ns + 10**9))
+                third = MirCrewIndexer(config_path=config_path)
+        finally:
+            os.unlink(config_path)
+
+        assert mock_load.call_count == 2
+        assert dict(third.cat_mappings) == {'51': 'TV'}
+        with pytest.raises(TypeError):
+            third.cat_mappings['99'] = 'Other'
+
     def test_extract_forum_id_from_url(self):
         """Test forum ID extraction from thread URLs."""
         with patch('src.mircrew.core.indexer.requests.Session'):
@@ -75,6 +129,8 @@ fields:
             ('https://mircrew-releases.org/viewtopic.php?t=1234&f=51', '51'),
             ('https://mircrew-releases.org/viewtopic.php?t=1234', None),
             ('https://mircrew-releases.org/index.php', None),
+            ('https://mircrew-releases.org/viewtopic.php?t=1234&ref=99', None),
+            ('https://mircrew-releases.org/viewtopic.php?f=52&t=1234#p5', '52'),
         ]
 
         for url, expected in test_cases:
@@ -120,6 +176,51 @@ class TestIndexerXMLHandling:
         assert '>' not in escaped  # Should be escaped
         assert '&' not in escaped  # Should be escaped unless part of entity
 
+    def test_parse_magnet_hash_and_display_name(self):
+        """Test that one magnet URL parse yields both the btih hash and the dn."""
+        with patch('src.mircrew.core.indexer.requests.Session'):
+            indexer = MirCrewIndexer()
+
+        btih = 'a1b2c3d4e5' * 4
+        test_cases = [
+            (f"magnet:?xt=urn:btih:{btih}&dn=Show.S01E01.mkv&tr=udp://t", (btih, "Show.S01E01.mkv")),
+            (f"magnet:?dn=Show+S01E02&xt=urn:btih:{btih}", (btih, "Show S01E02")),
+            (f"magnet:?xt=urn:btih:{btih}", (btih, None)),
+            (f"magnet:?dn=&dn=Tom+%26+Jerry&xt=urn%3Abtih%3A{btih}", (btih, "Tom & Jerry")),
+            ("magnet:?xt=urn:btih:short&dn=Name", ("", "Name")),
+            ("https://example.com/?dn=Name", ("", None)),
+            ("", ("", None)),
+        ]
+
+        for magnet_url, expected in test_cases:
+            assert indexer._parse_magnet(magnet_url) == expected
+
+    def test_torznab_xml_is_well_formed_with_special_characters(self):
+        """Test that every dynamic field is escaped so the feed stays parseable."""
+        from lxml import etree
+
+        with patch('src.mircrew.core.indexer.requests.Session'):
+            indexer = MirCrewIndexer()
+
+        magnet = {
+            'title': 'Tom & Jerry <Complete> "Remastered"',
+            'link': f"magnet:?xt=urn:btih:{'a' * 40}&dn=Tom+%26+Jerry",
+            'details': 'https://mircrew-releases.org/viewtopic.php?f=25&t=1&x=<1>',
+            'category': 'Movies',
+            'category_id': '25',
+            'size': '1GB',
+            'pub_date': '2024-01-01T00:00:00',
+            'description': "Magnet: Tom & Jerry's <best>",
+        }
+
+        xml = indexer._build_torznab_xml([magnet])
+        root = etree.fromstring(xml.encode('utf-8'))
+
+        assert root.findtext('channel/item/title') == magnet['title']
+        assert root.findtext('channel/item/link') == magnet['link']
+        assert root.findtext('channel/item/guid') == 'magnet-<1>-0'
+        assert root.findtext('channel/item/description') == magnet['description']
+
 
 class TestSizeHandling:
     """Test size parsing and byte conversion functionality."""
@@ -179,6 +280,76 @@ class TestSizeHandling:
             result = indexer._convert_size_to_bytes(size_str)
             assert result == expected_bytes, f"Failed to convert '{size_str}': expected {expected_bytes}, got {result}"
 
+    def test_extracted_magnets_carry_size_in_bytes(self):
+        """Test that the thread size is converted once and stored on each magnet."""
+        with patch('src.mircrew.core.indexer.requests.Session'):
+            indexer = MirCrewIndexer()
+
+        indexer.session = Mock()
+        indexer.unlocker = Mock()
+        indexer.unlocker.extract_magnets_with_unlock.return_value = [
+            f"magnet:?xt=urn:btih:{'a' * 40}&dn=One.mkv",
+            f"magnet:?xt=urn:btih:{'b' * 40}&dn=Two.mkv",
+        ]
+        thread = {'title': 'Thread', 'details': 'https://mircrew-releases.org/viewtopic.php?t=1', 'size': '2GB'}
+
+        with patch.object(indexer, '_convert_size_to_bytes', wraps=indexer._convert_size_to_bytes) as mock_convert:
+            magnets = indexer._extract_thread_magnets(thread)
+
+        mock_convert.assert_called_once_with('2GB')
+        assert [m['size_bytes'] for m in magnets] == [2000000000, 2000000000]
+
+    def test_thread_magnets_are_cached_until_reauthentication(self):
+        """Test that a thread's magnets are fetched once per TTL window and login."""
+        with patch('src.mircrew.core.indexer.requests.Session'):
+            indexer = MirCrewIndexer()
+
+        indexer.session = Mock()
+        indexer.unlocker = Mock()
+        indexer.unlocker.extract_magnets_with_unlock.return_value = [f"magnet:?xt=urn:btih:{'c' * 40}&dn=Ep.mkv"]
+        thread = {'title': 'Thread', 'details': 'https://mircrew-releases.org/viewtopic.php?t=7', 'size': '1GB'}
+
+        first = indexer._extract_thread_magnets(thread)
+        second = indexer._extract_thread_magnets({**thread, 'title': 'Renamed'})
+
+        assert indexer.unlocker.extract_magnets_with_unlock.call_count == 1
+        assert first[0]['link'] == second[0]['link']
+
+        # Expired entries are fetched again
+        with patch('src.mircrew.core.indexer.time.monotonic', return_value=float('inf')):
+            indexer._extract_thread_magnets(thread)
+        assert indexer.unlocker.extract_magnets_with_unlock.call_count == 2
+
+        # A new login drops the cache
+        indexer.login_handler = Mock(session=Mock())
+        indexer.login_handler.login.return_value = True
+        with patch('src.mircrew.core.indexer.MagnetUnlocker'):
+            assert indexer.authenticate() is True
+        assert indexer._thread_cache == {}
+
+    def test_clear_cache_forces_refetch(self):
+        """Test that clear_cache() drops cached thread magnets."""
+        with patch('src.mircrew.core.indexer.requests.Session'):
+            indexer = MirCrewIndexer()
+
+        indexer.session = Mock()
+        indexer.unlocker = Mock()
+        indexer.unlocker.extract_magnets_with_unlock.return_value = [f"magnet:?xt=urn:btih:{'d' * 40}&dn=Ep.mkv"]
+        thread = {'title': 'Thread', 'details': 'https://mircrew-releases.org/viewtopic.php?t=8', 'size': '1GB'}
+
+        indexer._extract_thread_magnets(thread)
+        indexer.clear_cache()
+        indexer._extract_thread_magnets(thread)
+
+        assert indexer.unlocker.extract_magnets_with_unlock.call_count == 2
+
+    def test_size_fast_path_agrees_with_parser(self):
+        """Test that the precomputed default sizes match the full size parser."""
+        from src.mircrew.core.indexer import _SIZE_FAST, _size_to_bytes
+
+        for size_str, size_bytes in _SIZE_FAST.items():
+            assert _size_to_bytes(size_str) == size_bytes, size_str
+
     def test_convert_size_to_bytes_fallback(self):
         """Test fallback behavior for unparseable size strings."""
         with patch('src.mircrew.core.indexer.requests.Session'):
@@ -235,6 +406,47 @@ class TestIndexingFunctionality:
             assert thread_id.isdigit()
             assert len(thread_id) > 0
 
+    def test_absolute_url_matches_urljoin(self):
+        """Test that the relative-link fast path resolves exactly like urljoin."""
+        from urllib.parse import urljoin
+
+        with patch('src.mircrew.core.indexer.requests.Session'):
+            indexer = MirCrewIndexer()
+
+        hrefs = [
+            './viewtopic.php?f=51&t=123',
+            '/viewtopic.php?t=9',
+            'viewtopic.php?t=9',
+            '../viewtopic.php?t=9',
+            './../viewtopic.php?t=9',
+            '//cdn.example.com/x',
+            'https://other.example.com/viewtopic.php?t=1',
+        ]
+
+        for href in hrefs:
+            assert indexer._absolute_url(href) == urljoin(indexer.base_url, href), href
+
+    def test_filter_relevant_results_partial_matching(self):
+        """Test substring, word-prefix and hyphen/colon matching of query terms."""
+        with patch('src.mircrew.core.indexer.requests.Session'):
+            indexer = MirCrewIndexer()
+
+        titles = [
+            'Dexter: Resurrection S01E01',
+            'The Animatrix 2003',
+            'Spider-Man No Way Home',
+            'Matrix Reloaded',
+            'Unrelated Movie',
+        ]
+        threads = [{'title': title} for title in titles]
+
+        assert [t['title'] for t in indexer._filter_relevant_results(threads, 'dexter resurrection')] == [titles[0]]
+        assert [t['title'] for t in indexer._filter_relevant_results(threads, 'Matrix')] == [titles[1], titles[3]]
+        assert [t['title'] for t in indexer._filter_relevant_results(threads, 'man way')] == [titles[2]]
+        # A title word that is a prefix of the term also matches
+        assert indexer._contains_partial_match('reloadedx', 'matrix reloaded')
+        assert not indexer._contains_partial_match('zion', 'matrix reloaded')
+
     def test_thread_id_search_invalid(self):
         """Test error handling for invalid thread search syntax."""
         with patch('src.mircrew.core.indexer.requests.Session'):
@@ -255,6 +467,180 @@ class TestIndexingFunctionality:
                     # This is expected to fail
                     assert not thread_id.isdigit()
 
+    def test_search_extracts_threads_concurrently_in_order(self):
+        """Test that magnets from concurrently fetched threads keep search result order."""
+        with patch('src.mircrew.core.indexer.requests.Session'):
+            indexer = MirCrewIndexer()
+
+        threads = [{'title': f'Thread {i}', 'details': f'https://example.com/t={i}'} for i in range(12)]
+        indexer.session = Mock()
+        indexer.session.get.return_value = Mock(status_code=200, text='<html></html>')
+
+        def fake_extract(thread):
+            return [{'title': thread['title']}]
+
+        with patch.object(indexer, 'authenticate', return_value=True), \
+             patch.object(indexer, '_parse_search_response', return_value=threads), \
+             patch.object(indexer, '_extract_thread_magnets', side_effect=fake_extract) as mock_extract, \
+             patch.object(indexer, '_build_torznab_xml', return_value='<rss/>') as mock_build:
+            assert indexer.search(q='test') == '<rss/>'
+
+        assert mock_extract.call_count == len(threads)
+        built = mock_build.call_args[0][0]
+        assert [m['title'] for m in built] == [t['title'] for t in threads]
+
+    def test_authenticate_shares_login_session_with_unlocker(self):
+        """Test that the unlocker reuses the login session and its pooled adapter."""
+        with patch('src.mircrew.core.indexer.requests.Session'):
+            indexer = MirCrewIndexer()
+
+        login_session = requests.Session()
+        indexer.login_handler = Mock(session=login_session)
+        indexer.login_handler.login.return_value = True
+
+        assert indexer.authenticate() is True
+        assert indexer.session is login_session
+        assert indexer.unlocker.session is login_session
+        assert indexer.unlocker.logged_in is True
+
+    def test_parse_search_results_extracts_rows(self):
+        """Test that result rows with a topic title link become thread entries."""
+        with patch('src.mircrew.core.indexer.requests.Session'):
+            indexer = MirCrewIndexer()
+
+        html = '''
+        <html><body><ul>
+            <li class="row bg1"><a class="topictitle" href="./viewtopic.php?f=51&amp;t=123">Show S01 1080p</a> by user</li>
+            <li class="row"><a href="memberlist.php">No topic title link</a></li>
+            <div class="bg2"><a class="topictitle" href="viewtopic.php?f=25&amp;t=9">Movie 2020 1080p</a></div>
+        </ul></body></html>
+        '''
+
+        threads = indexer._parse_search_results(html, 'test')
+
+        assert [t['title'] for t in threads] == ['Show S01 1080p', 'Movie 2020 1080p']
+        assert threads[0]['details'] == 'https://mircrew-releases.org/viewtopic.php?f=51&t=123'
+        assert threads[0]['forum_id'] == '51'
+        assert threads[1]['category_id'] == '25'
+        assert indexer._parse_search_results('', 'test') == []
+
+    def test_parse_search_response_streams_chunks(self):
+        """Test that a streamed search page split mid-tag parses like the whole page."""
+        with patch('src.mircrew.core.indexer.requests.Session'):
+            indexer = MirCrewIndexer()
+
+        rows = ''.join(
+            f'<li class="row"><a class="topictitle" href="./viewtopic.php?f=52&amp;t={i}">Show S01E0{i} 1080p</a></li>'
+            for i in range(5)
+        )
+        page = f'<html><head><meta charset="utf-8"></head><body><ul>{rows}</ul></body></html>'.encode('utf-8')
+        chunks = [page[i:i + 7] for i in range(0, len(page), 7)]
+        response = Mock()
+        response.iter_content.return_value = iter(chunks)
+
+        threads = indexer._parse_search_response(response, 'show')
+
+        assert [t['title'] for t in threads] == [f'Show S01E0{i} 1080p' for i in range(5)]
+        assert threads[4]['details'] == 'https://mircrew-releases.org/viewtopic.php?f=52&t=4'
+
+    def test_parse_search_results_limits_to_25_threads(self):
+        """Test that parsing stops after the first 25 valid rows."""
+        with patch('src.mircrew.core.indexer.requests.Session'):
+            indexer = MirCrewIndexer()
+
+        rows = ''.join(
+            f'<li class="row"><a class="topictitle" href="viewtopic.php?f=25&amp;t={i}">Movie number {i}</a></li>'
+            for i in range(40)
+        )
+        threads = indexer._parse_search_results(f'<html><body><ul>{rows}</ul></body></html>', 'movie')
+
+        assert len(threads) == 25
+        assert threads[-1]['title'] == 'Movie number 24'
+
+    def test_thread_search_builds_torznab_items(self):
+        """Test that direct thread search writes one Torznab item per magnet."""
+        with patch('src.mircrew.core.indexer.requests.Session'):
+            indexer = MirCrewIndexer()
+
+        magnets = [{
+            'title': f'Show.S01E0{i}.mkv',
+            'link': f'magnet:?xt=urn:btih:{str(i) * 40}&dn=Show.S01E0{i}.mkv',
+            'details': 'https://mircrew-releases.org/viewtopic.php?t=180404',
+            'category': 'TV',
+            'category_id': '52',
+            'size': '2GB',
+            'pub_date': '2024-01-01T00:00:00',
+        } for i in range(1, 3)]
+
+        with patch.object(indexer, '_extract_thread_magnets', return_value=magnets):
+            xml = indexer._search_thread_by_id('thread::180404')
+
+        assert xml.startswith('<?xml version="1.0" encoding="UTF-8"?>\n<rss')
+        assert xml.endswith('</item>\n</channel>\n</rss>')
+        assert xml.count('<item>') == 2
+        assert '<guid>thread-180404-1</guid>' in xml
+        assert f'/download/{"2" * 40}"' in xml
+
+    def test_authenticate_reuses_recent_login(self):
+        """Test that authenticate() skips the login round-trip within the TTL window."""
+        with patch('src.mircrew.core.indexer.requests.Session'):
+            indexer = MirCrewIndexer()
+
+        indexer.login_handler = Mock(session=requests.Session())
+        indexer.login_handler.login.return_value = True
+
+        assert indexer.authenticate() is True
+        assert indexer.authenticate() is True
+        assert indexer.login_handler.login.call_count == 1
+
+        # Once the window has passed, an expired session triggers a fresh login
+        indexer.login_handler.is_logged_in.return_value = False
+        with patch('src.mircrew.core.indexer.time.monotonic', return_value=float('inf')):
+            assert indexer.authenticate() is True
+        assert indexer.login_handler.login.call_count == 2
+
+    @staticmethod
+    def _indexer_after_ttl(index_page):
+        """Log an indexer in, then serve index_page to its session checks."""
+        with patch('src.mircrew.core.indexer.requests.Session'):
+            indexer = MirCrewIndexer()
+
+        indexer.login_handler.login = Mock(return_value=True)
+        assert indexer.authenticate() is True
+
+        session = indexer.login_handler.session
+        session.head.return_value = Mock(status_code=200, headers={})
+        session.get.return_value = Mock(status_code=200, url='https://mircrew-releases.org/index.php')
+        session.get.return_value.iter_content.return_value = iter([index_page])
+        return indexer
+
+    def test_authenticate_extends_still_valid_session(self):
+        """Test that a session still valid after the TTL is kept without a new login."""
+        indexer = self._indexer_after_ttl(
+            b'<html><body><a href="./ucp.php?mode=logout&amp;sid=abc">Esci</a>'
+            b'<a href="./viewforum.php?f=25">Film</a></body></html>'
+        )
+        unlocker = indexer.unlocker
+
+        with patch('src.mircrew.core.indexer.time.monotonic', return_value=1e9):
+            assert indexer.authenticate() is True
+            assert indexer._auth_expiry > 1e9
+
+        assert indexer.login_handler.login.call_count == 1
+        assert indexer.unlocker is unlocker
+
+    def test_authenticate_relogs_expired_session_after_ttl(self):
+        """Test that a guest page after the TTL triggers a new login instead of extending it."""
+        indexer = self._indexer_after_ttl(
+            b'<html><body><form action="./ucp.php?mode=login" method="post"></form>'
+            b'<a href="./viewforum.php?f=25">Film</a> 1234 Threads 5678 Posts</body></html>'
+        )
+
+        with patch('src.mircrew.core.indexer.time.monotonic', return_value=1e9):
+            assert indexer.authenticate() is True
+
+        assert indexer.login_handler.login.call_count == 2
+
 
 if __name__ == '__main__':
     # Test can be run with: python -m pytest tests/unit/test_indexer.py
@@ -97,6 +97,30 @@ class TestMagnetUnlocker:
         result = unlocker._extract_first_post_id(soup)
         assert result is None
 
+    def test_extract_first_post_id_fallback_priority(self, unlocker):
+        """Test that fallbacks are ranked by kind, not by position on the page"""
+        html_content = '''
+        <html>
+        <body>
+            <a href="./viewtopic.php?post_id=11">Permalink</a>
+            <div id="post_22">Post</div>
+            <a id="post_33">Anchor</a>
+            <span id="thanks_44">Thanks</span>
+        </body>
+        </html>
+        '''
+        soup = BeautifulSoup(html_content, 'html.parser')
+        assert unlocker._extract_first_post_id(soup) == '44'
+
+        soup.find(id='thanks_44').decompose()
+        assert unlocker._extract_first_post_id(soup) == '33'
+
+        soup.find(id='post_33').decompose()
+        assert unlocker._extract_first_post_id(soup) == '22'
+
+        soup.find(id='post_22').decompose()
+        assert unlocker._extract_first_post_id(soup) == '11'
+
     def test_find_thanks_button_success(self, unlocker):
         """Test finding thanks button with correct ID"""
         html_content = '''
@@ -146,6 +170,24 @@ class TestMagnetUnlocker:
         result = unlocker._click_thanks_button(thread_url, 'lnk_thanks_post123')
         assert result is True
 
+    def test_unlock_magnets_clicks_thanks_without_refetching(self, unlocker):
+        """Test that the thanks href is taken from the page already fetched by unlock_magnets"""
+        thread_url = "https://mircrew-releases.org/viewtopic.php?f=51&t=456"
+        page = MagicMock(status_code=200, content=b'''
+        <html><body>
+            <a id="lnk_thanks_post123" href="./viewtopic.php?f=51&amp;p=123&amp;thanks=123&amp;to_id=9">Thanks</a>
+        </body></html>
+        ''')
+        unlocker.session = MagicMock()
+        unlocker.session.get.side_effect = [page, MagicMock(status_code=200)]
+
+        assert unlocker.unlock_magnets(thread_url) is True
+
+        assert [c.args[0] for c in unlocker.session.get.call_args_list] == [
+            thread_url,
+            "https://mircrew-releases.org/viewtopic.php?f=51&p=123&thanks=123&to_id=9",
+        ]
+
     def test_click_thanks_button_failure(self, unlocker):
         """Test thanks button clicking failure"""
         unlocker.session = None
@@ -268,6 +310,78 @@ class TestMagnetUnlocker:
                 assert isinstance(magnets, list)
                 assert len(magnets) >= 0  # Flexible check for first magnet
 
+    def test_extract_magnets_parses_raw_response_bytes(self, unlocker):
+        """Test that thread pages are parsed from the response bytes, whatever their encoding"""
+        btih = 'ab' * 20
+        unlocker.session = MagicMock()
+        unlocker.session.get.return_value = MagicMock(
+            status_code=200,
+            content=(
+                '<html><head><meta charset="utf-8"></head><body>'
+                '<div class="postbody"><p>Qualità 1080p</p>'
+                f'<a href="magnet:?xt=urn:btih:{btih}&amp;dn=Film.mkv">Magnet</a></div>'
+                '</body></html>'
+            ).encode('utf-8'),
+        )
+
+        magnets = unlocker.extract_magnets_with_unlock("https://mock-forum.com/viewtopic.php?t=123")
+
+        assert magnets == [f"magnet:?xt=urn:btih:{btih}&dn=Film.mkv"]
+        # Nothing to unlock, so the thread is fetched only once
+        assert unlocker.session.get.call_count == 1
+
+    def test_extract_magnets_refetches_only_after_thanks_click(self, unlocker):
+        """Test that the thread is fetched again only when the thanks button was clicked"""
+        unlocker.session = MagicMock()
+        unlocker.session.get.return_value = MagicMock(status_code=200, content=b'<div class="postbody">Post</div>')
+
+        with patch.object(unlocker, '_unlock_page', return_value=(True, True)):
+            unlocker.extract_magnets_with_unlock("https://mock-forum.com/viewtopic.php?t=123")
+        assert unlocker.session.get.call_count == 2
+
+    def test_find_first_post_container_prefers_postbody(self, unlocker):
+        """Test that the first non-empty container of the most specific kind is the first post"""
+        html_content = '''
+        <html>
+        <body>
+            <div class="post"><div class="content">Sidebar</div></div>
+            <div class="postbody"></div>
+            <div class="postbody"><a href="#">First post</a></div>
+            <div class="postbody">Reply</div>
+        </body>
+        </html>
+        '''
+        soup = BeautifulSoup(html_content, 'html.parser')
+
+        first_post = unlocker._find_first_post_container(soup)
+        assert first_post is not None
+        assert first_post.get_text(strip=True) == 'First post'
+
+        no_postbody = BeautifulSoup('<div class="post">A</div><li class="content">B</li>', 'html.parser')
+        assert unlocker._find_first_post_container(no_postbody).get_text() == 'A'
+        assert unlocker._find_first_post_container(BeautifulSoup('<p>None</p>', 'html.parser')) is None
+
+    def test_collect_magnets_cleans_and_dedupes_in_order(self):
+        """Test that magnet links are cleaned, validated and deduplicated in page order"""
+        from src.mircrew.core.magnet_unlock import _collect_magnets
+
+        first, second = 'a' * 40, 'b' * 40
+        html_content = f'''
+        <div class="postbody">
+            <a href="magnet:?xt=urn:btih:{second}&amp;dn=Two.mkv">Two</a>
+            <a href="magnet:?xt=urn:btih:{first}&amp;dn=One .mkv#frag">One</a>
+            <a href="magnet:?xt=urn:btih:{second}&amp;dn=Two.mkv">Two again</a>
+            <a href="magnet:?xt=urn:btih:short&amp;dn=Bad.mkv">Bad</a>
+            <a href="https://example.com/">Site</a>
+        </div>
+        '''
+        soup = BeautifulSoup(html_content, 'html.parser')
+
+        assert _collect_magnets(soup) == [
+            f"magnet:?xt=urn:btih:{second}&dn=Two.mkv",
+            f"magnet:?xt=urn:btih:{first}&dn=One.mkv",
+        ]
+
     def test_magazine_pattern_matching(self):
         """Test magazine-style thanks element detection"""
         html_content = '''
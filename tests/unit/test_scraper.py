@@ -34,6 +34,25 @@ class TestMirCrewScraper(unittest.TestCase):
         self.assertIn('User-Agent', self.scraper.session.headers)
         self.assertIn('Accept', self.scraper.session.headers)
 
+    def test_own_session_mounts_pooled_retrying_adapter(self):
+        """Test that a standalone scraper session can keep one connection per worker alive"""
+        from src.mircrew.core.scraper import _THREAD_WORKERS
+
+        adapter = self.scraper.session.get_adapter(self.scraper.base_url)
+        self.assertGreaterEqual(adapter._pool_maxsize, _THREAD_WORKERS)
+        self.assertGreater(adapter.max_retries.total, 0)
+        self.assertEqual(adapter.max_retries.allowed_methods, frozenset(['GET', 'HEAD']))
+        self.assertNotIn(429, adapter.max_retries.status_forcelist)
+        self.assertIs(self.scraper.session.get_adapter('http://example.com'), adapter)
+
+    @patch('src.mircrew.core.scraper.requests.Session.get')
+    def test_request_error_status_not_retried(self, mock_get):
+        """Test that an error status is not retried on top of the adapter's own retries"""
+        mock_get.return_value = MagicMock(status_code=503)
+
+        self.assertIsNone(self.scraper._make_request_with_retry('https://mircrew-releases.org/x'))
+        self.assertEqual(mock_get.call_count, 1)
+
     def test_base_url_correct(self):
         """Test that base URL is properly set"""
         self.assertEqual(self.scraper.base_url, "https://mircrew-releases.org")
@@ -123,6 +142,20 @@ class TestMirCrewScraper(unittest.TestCase):
         threads = self.scraper._parse_search_page(html_content)
         self.assertEqual(len(threads), 0)
 
+    def test_parse_search_page_from_raw_bytes(self):
+        """Test parsing the undecoded response body, letting lxml detect the encoding"""
+        html_content = '''
+        <html><head><meta charset="utf-8"></head>
+        <body>
+            <li class="row"><a class="topictitle" href="./viewtopic.php?f=51&amp;t=77">Città Proibita</a></li>
+        </body>
+        </html>
+        '''.encode('utf-8')
+
+        threads = self.scraper._parse_search_page(html_content)
+        self.assertEqual([t['title'] for t in threads], ['Città Proibita'])
+        self.assertEqual(threads[0]['id'], '77')
+
     @patch('src.mircrew.core.scraper.requests.Session.get')
     def test_extract_thread_magnets_success(self, mock_get):
         """Test successful magnet extraction from thread"""
@@ -282,5 +315,27 @@ class TestMirCrewScraper(unittest.TestCase):
                     self.assertIn("🎉 Total results: 1", print_capture)
                     self.assertIsInstance(result, str)
 
+    def test_search_forum_keeps_thread_order_when_concurrent(self):
+        """Test that magnets come back in search order even if later threads finish first"""
+        import time
+
+        threads = [{'title': f"Thread {i}", 'url': f"{self.scraper.base_url}/viewtopic.php?t={i}"} for i in range(5)]
+
+        def extract(thread):
+            index = int(thread['url'].rsplit('=', 1)[1])
+            time.sleep(0.01 * (5 - index))  # Earlier threads are the slowest
+            if index == 2:
+                raise ValueError("broken thread")
+            return [{'thread_title': thread['title'], 'magnet_url': f"magnet:?xt=urn:btih:{index}", 'category': 'Movies'}]
+
+        with patch.object(self.scraper, 'authenticate'), \
+             patch.object(self.scraper, '_make_request_with_retry', return_value=MagicMock(status_code=200)), \
+             patch.object(self.scraper, '_parse_search_page', return_value=threads), \
+             patch.object(self.scraper, '_extract_thread_magnets', side_effect=extract), \
+             patch.object(self.scraper, '_format_results', side_effect=lambda magnets: magnets):
+            results = self.scraper.search_forum("ordered query")
+
+        self.assertEqual([m['thread_title'] for m in results], ["Thread 0", "Thread 1", "Thread 3", "Thread 4"])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file